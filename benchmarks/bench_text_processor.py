@@ -0,0 +1,428 @@
+"""
+Text Processing System Benchmarks
+Measures how every text_processor function scales with input size.
+
+Usage:
+    python benchmarks/bench_text_processor.py [--sizes 1K,1M,16M] [--functions count_words,...]
+        [--repeat N] [--no-memory] [--baseline FILE] [--save-baseline FILE] [--output FILE]
+
+For each function and corpus size the best time of several runs is reported
+along with throughput and, unless --no-memory is given, the peak memory
+allocated during one call. The scaling exponent is the slope of time against
+size on a log-log scale (1.0 means linear). With --baseline the timings are
+compared against a file written earlier with --save-baseline. The functions
+listed in COMPARISONS are also timed against the reference they are meant to
+beat; either kind of slowdown makes the exit status 1. The streaming
+functions read from and write to temporary files, and the suffix index is
+skipped on corpora larger than 1 MB.
+"""
+
+import argparse
+import atexit
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import text_processor as tp
+
+# Named corpus sizes accepted by --sizes
+SIZES = {
+    "1K": 1024,
+    "64K": 64 * 1024,
+    "1M": 1024 * 1024,
+    "16M": 16 * 1024 * 1024,
+    "256M": 256 * 1024 * 1024,
+    "1G": 1024 * 1024 * 1024,
+}
+
+DEFAULT_SIZES = "1K,64K,1M,16M"
+
+# Timings slower than the baseline by more than this factor are flagged
+REGRESSION_THRESHOLD = 1.25
+
+# Largest corpus given to benchmarks that would otherwise take minutes. Past
+# 1 MB the corpus repeats its first block, which is the worst case for
+# building a suffix array.
+_SIZE_LIMITS = {
+    "SuffixIndex": 1024 * 1024,
+    "SuffixIndex.find_all": 1024 * 1024,
+}
+
+# Directory holding the corpus files of the current size, and those files
+_corpus_directory = None
+_corpus_files = {}
+
+_VOCABULARY = [
+    "the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "text",
+    "processing", "system", "string", "analysis", "Engineering", "Marketing",
+    "Finance", "report", "level", "radar", "INFO:", "login", "successful",
+    "user", "data,", "value;", "(note)", "apples", "3", "42", "2023",
+]
+
+def generate_corpus(size, seed=0):
+    """
+    Generate synthetic text of an exact size.
+
+    The text mixes words, punctuation, numbers, newlines, email addresses and
+    dates. A block of up to 1 MB is generated and repeated to reach the size.
+
+    Args:
+        size (int): Number of characters to generate
+        seed (int, optional): Random seed, so runs are comparable
+
+    Returns:
+        str: Generated text
+    """
+    rng = random.Random(seed)
+    block_size = min(size, 1024 * 1024)
+    parts = []
+    length = 0
+
+    while length < block_size:
+        roll = rng.random()
+        if roll < 0.02:
+            word = f"user{rng.randint(1, 999)}@example{rng.randint(1, 9)}.com"
+        elif roll < 0.04:
+            word = f"20{rng.randint(10, 29)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        else:
+            word = rng.choice(_VOCABULARY)
+        separator = "\n" if rng.random() < 0.08 else " "
+        parts.append(word + separator)
+        length += len(word) + 1
+
+    block = "".join(parts)[:block_size]
+    repeats = -(-size // len(block)) if block else 0
+    return (block * repeats)[:size]
+
+def _table_rows(text):
+    """Group the corpus words into four-column table rows."""
+    words = text.split()
+    return [words[i:i + 4] for i in range(0, len(words) - 3, 4)]
+
+def _template(text):
+    """Wrap the corpus in a template; it has no braces of its own."""
+    half = len(text) // 2
+    return text[:half] + "{name}" + text[half:] + "{value}"
+
+def _corpus_file(text, name="corpus.txt"):
+    """
+    Write the corpus to a temporary file for the streaming benchmarks.
+
+    Each file is written once per corpus size and removed by
+    _remove_corpus_files().
+
+    Args:
+        text (str): Corpus text
+        name (str, optional): File name, so derived corpora get their own file
+
+    Returns:
+        str: Path of the file
+    """
+    global _corpus_directory
+    if name not in _corpus_files:
+        if _corpus_directory is None:
+            _corpus_directory = tempfile.mkdtemp(prefix="bench_text_processor_")
+            atexit.register(shutil.rmtree, _corpus_directory, True)
+        path = os.path.join(_corpus_directory, name)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        _corpus_files[name] = path
+    return _corpus_files[name]
+
+def _remove_corpus_files():
+    """Delete the corpus files written for the current size."""
+    for path in _corpus_files.values():
+        os.remove(path)
+    _corpus_files.clear()
+
+def _count_characters_file(path):
+    """Count the characters of a corpus file with count_characters_stream."""
+    with open(path, encoding="utf-8") as f:
+        return tp.count_characters_stream(f)
+
+def _count_words_file(path):
+    """Count the words of a corpus file with count_words_stream."""
+    with open(path, encoding="utf-8") as f:
+        return tp.count_words_stream(f)
+
+def _read_csv_file(path):
+    """Read every record of a CSV file with iter_csv_records."""
+    with open(path, encoding="utf-8", newline="") as f:
+        deque(tp.iter_csv_records(f), maxlen=0)
+
+def _write_table_file(headers, rows, path):
+    """Write a table to a file with write_text_table."""
+    with open(path, "w", encoding="utf-8") as f:
+        return tp.write_text_table(headers, rows, f)
+
+def _analyze_separately(text):
+    """Build the analyze_text figures with one call per statistic."""
+    return (tp.count_characters(text), tp.count_words(text), tp.count_vowels_and_consonants(text),
+            tp.is_palindrome(text), tp.extract_email_addresses(text), tp.extract_dates(text))
+
+def _template_records(text):
+    """Build one set of template variables per corpus word."""
+    template = "Dear {name}, order {order} of {count} items totalling {total:.2f} ships on {date} to {city}."
+    return (template, [{"name": word, "order": i, "count": 4, "total": 99.5, "date": "2023-05-15", "city": "Paris"}
+                       for i, word in enumerate(text.split())])
+
+def _compiled_records(text):
+    """Compile the record template outside the timed calls."""
+    template, variable_sets = _template_records(text)
+    return tp.compile_template(template), variable_sets
+
+def _render_records(template, variable_sets):
+    """Render a compiled template once per set of variables."""
+    deque(template.render_many(variable_sets), maxlen=0)
+
+def _format_map_records(template, variable_sets):
+    """Render a template with str.format_map once per set of variables."""
+    for variables in variable_sets:
+        template.format_map(variables)
+
+def _suffix_index_queries(index, patterns):
+    """Answer a list of substring queries from a built SuffixIndex."""
+    for pattern in patterns:
+        index.find_all(pattern)
+
+# Benchmarked functions: name -> (prepare(text) -> args, function name in
+# text_processor or a callable)
+BENCHMARKS = {
+    "count_characters": (lambda text: (text,), "count_characters"),
+    "count_words": (lambda text: (text,), "count_words"),
+    "extract_substring": (lambda text: (text, len(text) // 4, 3 * len(text) // 4), "extract_substring"),
+    "find_all_occurrences": (lambda text: (text, "the"), "find_all_occurrences"),
+    "replace_substring": (lambda text: (text, "the", "a"), "replace_substring"),
+    "split_text": (lambda text: (text,), "split_text"),
+    "join_text": (lambda text: (text.split(), " "), "join_text"),
+    "to_uppercase": (lambda text: (text,), "to_uppercase"),
+    "to_lowercase": (lambda text: (text,), "to_lowercase"),
+    "capitalize_text": (lambda text: (text,), "capitalize_text"),
+    "strip_whitespace": (lambda text: (text,), "strip_whitespace"),
+    "format_text_with_variables": (lambda text: (_template(text),), "format_text_with_variables"),
+    "is_palindrome": (lambda text: (text,), "is_palindrome"),
+    "count_vowels_and_consonants": (lambda text: (text,), "count_vowels_and_consonants"),
+    "extract_email_addresses": (lambda text: (text,), "extract_email_addresses"),
+    "extract_dates": (lambda text: (text,), "extract_dates"),
+    "parse_csv_line": (lambda text: (text.replace(" ", ","),), "parse_csv_line"),
+    "format_text_table": (lambda text: (["A", "B", "C", "D"], _table_rows(text)), "format_text_table"),
+    "analyze_text": (lambda text: (text,), "analyze_text"),
+    "analyze_text (separate calls)": (lambda text: (text,), _analyze_separately),
+    "replace_substrings": (lambda text: (text, {"the": "a", "fox": "cat", "dog": "wolf"}), "replace_substrings"),
+    "find_all_occurrences_multi": (lambda text: (text, ["the", "fox", "@", "2023"]), "find_all_occurrences_multi"),
+    "count_characters_stream": (lambda text: (_corpus_file(text),), _count_characters_file),
+    "count_words_stream": (lambda text: (_corpus_file(text),), _count_words_file),
+    "iter_csv_records": (lambda text: (_corpus_file(text.replace(" ", ","), "corpus.csv"),), _read_csv_file),
+    "write_text_table": (lambda text: (["A", "B", "C", "D"], _table_rows(text), _corpus_file("", "table.txt")),
+                         _write_table_file),
+    "compile_template/render_many": (_compiled_records, _render_records),
+    "str.format_map": (_template_records, _format_map_records),
+    "SuffixIndex": (lambda text: (text,), "SuffixIndex"),
+    "SuffixIndex.find_all": (lambda text: (tp.SuffixIndex(text), ["the", "fox", "@", "2023", "radar level"]),
+                             _suffix_index_queries),
+    "PatternSet.find_all": (lambda text: (tp.PatternSet(["the", "fox", "@", "2023"]), text),
+                            tp.PatternSet.find_all),
+}
+
+# Benchmarks expected to beat a reference benchmark on the same input:
+# name -> reference name
+COMPARISONS = {
+    "analyze_text": "analyze_text (separate calls)",
+    "compile_template/render_many": "str.format_map",
+}
+
+# Keyword arguments passed alongside the prepared positional arguments
+_KEYWORDS = {
+    "format_text_with_variables": {"name": "Alice", "value": 42},
+}
+
+def run_benchmark(name, text, repeat=3, measure_memory=True):
+    """
+    Time one function on one corpus.
+
+    Args:
+        name (str): Key in BENCHMARKS
+        text (str): Corpus text
+        repeat (int, optional): Number of timed runs; the best is kept
+        measure_memory (bool, optional): Also record peak allocated memory
+
+    Returns:
+        dict: "seconds", "throughput" (MB/s) and "peak_memory" (bytes or
+        None), or None when the corpus is over the benchmark's size limit
+    """
+    if len(text) > _SIZE_LIMITS.get(name, math.inf):
+        return None
+
+    prepare, target = BENCHMARKS[name]
+    function = getattr(tp, target) if isinstance(target, str) else target
+    args = prepare(text)
+    kwargs = _KEYWORDS.get(name, {})
+
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if measure_memory:
+        # Tracing slows the call down, so it is kept out of the timed runs
+        tracemalloc.start()
+        try:
+            function(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    throughput = len(text) / best / (1024 * 1024) if best > 0 else math.inf
+    return {"seconds": best, "throughput": throughput, "peak_memory": peak}
+
+def scaling_exponent(points):
+    """
+    Fit the slope of log(time) against log(size).
+
+    Args:
+        points (list): (size, seconds) pairs
+
+    Returns:
+        float: The exponent, or None with fewer than two usable points
+    """
+    usable = [(math.log(size), math.log(seconds)) for size, seconds in points if seconds > 0]
+    if len(usable) < 2:
+        return None
+
+    mean_x = sum(x for x, _ in usable) / len(usable)
+    mean_y = sum(y for _, y in usable) / len(usable)
+    spread = sum((x - mean_x) ** 2 for x, _ in usable)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in usable) / spread
+
+def _format_bytes(count):
+    """Format a byte count for the report."""
+    if count is None:
+        return "-"
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
+
+def _parse_sizes(value):
+    """Parse the --sizes option into a list of size labels."""
+    sizes = []
+    for label in value.split(","):
+        label = label.strip().upper()
+        if label not in SIZES:
+            raise argparse.ArgumentTypeError(f"Unknown size {label}; choose from {', '.join(SIZES)}")
+        sizes.append(label)
+    return sizes
+
+def main(argv=None):
+    """
+    Run the benchmark suite.
+
+    Args:
+        argv (list, optional): Command-line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: 1 if a regression against the baseline or a reference was
+        found, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the text_processor functions")
+    parser.add_argument("--sizes", type=_parse_sizes, default=_parse_sizes(DEFAULT_SIZES),
+                        help=f"comma-separated corpus sizes from {', '.join(SIZES)} (default {DEFAULT_SIZES})")
+    parser.add_argument("--functions", default=None, help="comma-separated functions to run (default all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement")
+    parser.add_argument("--no-memory", action="store_true", help="skip peak memory measurement")
+    parser.add_argument("--baseline", help="compare timings against this baseline file")
+    parser.add_argument("--save-baseline", help="write the timings to this baseline file")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    names = list(BENCHMARKS) if args.functions is None else [n.strip() for n in args.functions.split(",")]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown functions: {', '.join(unknown)}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {name: {} for name in names}
+    for label in args.sizes:
+        text = generate_corpus(SIZES[label])
+        for name in names:
+            results[name][label] = run_benchmark(name, text, args.repeat, not args.no_memory)
+        del text
+        _remove_corpus_files()
+
+    headers = ["Function", "Size", "Time (s)", "MB/s", "Peak memory", "vs baseline"]
+    rows = []
+    regressions = 0
+    for name in names:
+        for label in args.sizes:
+            result = results[name][label]
+            if result is None:
+                rows.append([name, label, "skipped", "-", "-", "-"])
+                continue
+            comparison = "-"
+            previous = baseline.get(name, {}).get(label)
+            if previous:
+                ratio = result["seconds"] / previous
+                comparison = f"{ratio:.2f}x"
+                if ratio > REGRESSION_THRESHOLD:
+                    comparison += " SLOWER"
+                    regressions += 1
+            rows.append([name, label, f"{result['seconds']:.6f}", f"{result['throughput']:.1f}",
+                         _format_bytes(result["peak_memory"]), comparison])
+
+    scaling_rows = []
+    for name in names:
+        exponent = scaling_exponent([(SIZES[label], results[name][label]["seconds"])
+                                     for label in args.sizes if results[name][label] is not None])
+        scaling_rows.append([name, "-" if exponent is None else f"{exponent:.2f}"])
+
+    comparison_rows = []
+    for name, reference in COMPARISONS.items():
+        if name not in results or reference not in results:
+            continue
+        for label in args.sizes:
+            result, expected = results[name][label], results[reference][label]
+            if result is None or expected is None or result["seconds"] <= 0:
+                continue
+            speedup = expected["seconds"] / result["seconds"]
+            comparison_rows.append([name, reference, label, f"{speedup:.2f}x" + ("" if speedup > 1 else " SLOWER")])
+            if speedup <= 1:
+                regressions += 1
+
+    report = (tp.format_text_table(headers, rows) + "\n\nScaling (time ~ size^k):\n"
+              + tp.format_text_table(["Function", "k"], scaling_rows))
+    if comparison_rows:
+        report += ("\n\nAgainst references (reference time / function time):\n"
+                   + tp.format_text_table(["Function", "Reference", "Size", "Speed-up"], comparison_rows))
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+    if args.save_baseline:
+        timings = {name: {label: results[name][label]["seconds"] for label in args.sizes
+                          if results[name][label] is not None} for name in names}
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(timings, f, indent=2, sort_keys=True)
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
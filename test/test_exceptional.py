@@ -32,7 +32,25 @@ def test_input_validation(test_obj):
             (extract_email_addresses, [None]),
             (extract_dates, [None]),
             (parse_csv_line, [None]),
-            (format_text_with_variables, [None])
+            (format_text_with_variables, [None]),
+            (count_characters_stream, [None]),
+            (count_words_stream, [None]),
+            (analyze_text, [None]),
+            (compile_template, [None]),
+            (SuffixIndex, [None]),
+            (replace_substrings, [None, {"old": "new"}]),
+            (replace_substrings, ["text", None]),
+            (is_palindrome_two_pointer, [None]),
+            (is_palindrome_file, [None]),
+            (parse_log_line, [None]),
+            (parse_log_stream, [None]),
+            (parse_log_file, [None]),
+            (TextView, [None]),
+            (TermFrequencyCounter().update, [None]),
+            (SpaceSavingCounter(10).update, [None]),
+            (to_uppercase_stream, [None, None]),
+            (to_lowercase_stream, [None, None]),
+            (capitalize_text_stream, [None, None])
         ]
         
         # Test all functions with None inputs
@@ -55,10 +73,53 @@ def test_input_validation(test_obj):
         with pytest.raises(ValueError):
             find_all_occurrences("test", "")
         
+        # Test multi-pattern search with invalid pattern sets
+        with pytest.raises(ValueError):
+            PatternSet([])
+        
+        with pytest.raises(ValueError):
+            find_all_occurrences_multi("test", ["t", ""])
+        
+        # Test corpus analysis with missing paths and bad pool settings
+        with pytest.raises(ValueError):
+            analyze_corpus(["no/such/file.txt"])
+        
+        with pytest.raises(ValueError):
+            analyze_corpus([], workers=0)
+        
+        # Test CSV streaming with an unterminated quoted field
+        with pytest.raises(ValueError):
+            list(iter_csv_records('id,"name\n1,Alice'))
+        
+        # Test suffix index queries and loading
+        with pytest.raises(ValueError):
+            SuffixIndex("banana").find_all("")
+        
+        with pytest.raises(ValueError):
+            SuffixIndex.load(__file__)  # Not an index file
+        
+        # Test JSON path streaming with missing source or path
+        with pytest.raises(ValueError):
+            list(iter_json_path(None, "users[*].name"))
+        
+        with pytest.raises(ValueError):
+            list(iter_json_path("{}", None))
+        
+        # Test lazy splitting with a missing source
+        with pytest.raises(ValueError):
+            list(iter_split(None))
+        
         # Test replace_substring with empty old string
         with pytest.raises(ValueError):
             replace_substring("test", "", "replacement")
         
+        # Test bulk replacement with an empty old string or None values
+        with pytest.raises(ValueError):
+            replace_substrings("test", {"": "x"})
+        
+        with pytest.raises(ValueError):
+            replace_substrings("test", {"t": None})
+        
         # Test format_text_with_variables with missing variables
         with pytest.raises(ValueError):
             format_text_with_variables("Hello, {name}!")  # Missing 'name' variable
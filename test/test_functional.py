@@ -1,6 +1,13 @@
 import pytest
+import asyncio
 import inspect
 import importlib
+import io
+import json
+import mmap
+import random
+import sys
+import text_service
 from test.TestUtils import TestUtils
 from text_processor import *
 
@@ -158,5 +165,904 @@ def test_implementation_techniques(test_obj):
         test_obj.yakshaAssert("test_implementation_techniques", False, "functional")
         pytest.fail(f"Implementation techniques test failed: {str(e)}")
 
+def test_streaming_counts(test_obj):
+    """Test chunked character and word counting over files and iterators"""
+    try:
+        sample_text = "The quick brown fox\njumps over   the lazy dog. "
+        
+        # Every chunk size must give the same answer as the in-memory functions
+        for chunk_size in (1, 2, 3, 7, 64):
+            assert count_characters_stream(io.StringIO(sample_text), chunk_size) == count_characters(sample_text), "Streaming character count should match count_characters"
+            assert count_words_stream(io.StringIO(sample_text), chunk_size) == count_words(sample_text), "Streaming word count should match count_words"
+        
+        # Words split across chunk boundaries are counted once
+        assert count_words_stream(["hel", "lo wor", "ld"]) == 2, "Words split across chunks should be counted once"
+        assert count_words_stream(["hello ", " ", "world"]) == 2, "Whitespace-only chunks should separate words"
+        
+        # Binary files are decoded as UTF-8 even when a character is split
+        encoded = "caf\u00e9 na\u00efve".encode("utf-8")
+        assert count_characters_stream(io.BytesIO(encoded), 4) == 10, "Multi-byte characters should be counted once"
+        assert count_words_stream(io.BytesIO(encoded), 4) == 2, "Binary streams should be decoded before counting"
+        
+        test_obj.yakshaAssert("test_streaming_counts", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_streaming_counts", False, "functional")
+        pytest.fail(f"Streaming counts test failed: {str(e)}")
+
+def test_multi_pattern_search(test_obj):
+    """Test single-pass search for several substrings"""
+    try:
+        patterns = PatternSet(["a", "an", "ana", "nan", "x"])
+        
+        # Each pattern gets the same overlapping positions as find_all_occurrences
+        result = patterns.find_all("banana")
+        for pattern in ["a", "an", "ana", "nan", "x"]:
+            assert result[pattern] == find_all_occurrences("banana", pattern), f"Positions for '{pattern}' should match find_all_occurrences"
+        
+        # A compiled pattern set can be reused across texts
+        assert patterns.find_all("xanax")["x"] == [0, 4], "Compiled patterns should be reusable"
+        assert find_all_occurrences_multi("aaa", ["a", "aa"]) == {"a": [0, 1, 2], "aa": [0, 1]}, "Should accept a plain list of patterns"
+        
+        # Matches are reported in a single pass ordered by where they end
+        assert list(PatternSet(["he", "she"]).iter_matches("she")) == [(0, "she"), (1, "he")], "Should report every match in one pass"
+        
+        test_obj.yakshaAssert("test_multi_pattern_search", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_multi_pattern_search", False, "functional")
+        pytest.fail(f"Multi-pattern search test failed: {str(e)}")
+
+def test_corpus_analysis(test_obj, tmp_path):
+    """Test parallel analysis of a directory of files"""
+    try:
+        (tmp_path / "a.txt").write_text("Mail bob@example.com on 2023-01-02", encoding="utf-8")
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "nested" / "b.txt").write_text("hello world", encoding="utf-8")
+        
+        report = analyze_corpus(str(tmp_path), workers=2, chunk_size=1)
+        totals = report["totals"]
+        assert totals["files"] == 2, "Should analyze every file in the directory tree"
+        assert totals["words"] == count_words("Mail bob@example.com on 2023-01-02") + 2, "Word totals should be merged"
+        assert totals["emails"] == 1 and totals["dates"] == 1, "Extraction totals should be merged"
+        assert report["files"][0]["emails"] == ["bob@example.com"], "Per-file results should be kept"
+        
+        # Running in-process gives the same report
+        assert analyze_corpus([str(tmp_path)], workers=1) == report, "Worker count should not change results"
+        
+        test_obj.yakshaAssert("test_corpus_analysis", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_corpus_analysis", False, "functional")
+        pytest.fail(f"Corpus analysis test failed: {str(e)}")
+
+def test_fused_text_analysis(test_obj):
+    """Test that the single-pass report matches the individual functions"""
+    try:
+        samples = list(initialize_data()) + ["", "Mail bob@example.com by 2023-05-15.", "Never odd or even"]
+        
+        for sample in samples:
+            report = analyze_text(sample)
+            vowels, consonants = count_vowels_and_consonants(sample)
+            assert report["characters"] == count_characters(sample), "Character count should match"
+            assert report["words"] == count_words(sample), "Word count should match"
+            assert (report["vowels"], report["consonants"]) == (vowels, consonants), "Vowel and consonant counts should match"
+            assert report["is_palindrome"] == is_palindrome(sample), "Palindrome check should match"
+            assert report["emails"] == extract_email_addresses(sample), "Extracted emails should match"
+            assert report["dates"] == extract_dates(sample), "Extracted dates should match"
+        
+        # A larger text gives the same report as the separate calls
+        text = " ".join(initialize_data()) * 200
+        report = analyze_text(text)
+        separate = (count_characters(text), count_words(text), count_vowels_and_consonants(text),
+                    is_palindrome(text), extract_email_addresses(text), extract_dates(text))
+        assert (report["characters"], report["words"], (report["vowels"], report["consonants"]),
+                report["is_palindrome"], report["emails"], report["dates"]) == separate, "Large report should match"
+        
+        test_obj.yakshaAssert("test_fused_text_analysis", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_fused_text_analysis", False, "functional")
+        pytest.fail(f"Fused text analysis test failed: {str(e)}")
+
+def test_compiled_templates(test_obj):
+    """Test parsed template reuse and bulk rendering"""
+    try:
+        template = compile_template("Hello, {name}! Order {order.id} ships in {days:>{width}} days.")
+        assert template.required == {"name", "order", "days", "width"}, "Required placeholders should be known up front"
+        assert compile_template("Hello, {name}! Order {order.id} ships in {days:>{width}} days.") is template, "Compiled templates should be cached"
+        
+        # Rendering matches format_text_with_variables
+        greeting = compile_template("Hello, {name}!")
+        assert greeting.render(name="John") == format_text_with_variables("Hello, {name}!", name="John"), "Render should match format_text_with_variables"
+        
+        # Bulk rendering takes an iterable of variable dicts
+        rendered = list(compile_template("{a}-{b}").render_many([{"a": 1, "b": 2}, {"a": 3, "b": 4}]))
+        assert rendered == ["1-2", "3-4"], "render_many should render each set of variables"
+        
+        # Missing variables are reported before any value is formatted
+        with pytest.raises(ValueError, match="name"):
+            greeting.render(other="x")
+        formatted = []
+        class Value:
+            def __format__(self, spec):
+                formatted.append(spec)
+                return "v"
+        with pytest.raises(ValueError, match="b"):
+            compile_template("{a} {b}").render(a=Value())
+        with pytest.raises(ValueError, match="b"):
+            list(compile_template("{a} {b}").render_many([{"a": Value()}]))
+        assert formatted == [], "No value should be formatted when a variable is missing"
+        
+        # Positional fields are still rejected by str.format
+        with pytest.raises(IndexError):
+            format_text_with_variables("{}", name="x")
+        
+        # Attribute, index, conversion and nested fields match str.format
+        class Order:
+            id = 7
+        text = "{order.id} {items[0]} {lookup[key]} {name!r:>8} {total:{width}.{digits}f} {{literal}}"
+        variables = {"order": Order(), "items": ["x"], "lookup": {"key": 1}, "name": "n",
+                     "total": 3.14159, "width": 8, "digits": 2}
+        assert compile_template(text).render(**variables) == text.format(**variables), "Fields should render like str.format"
+        
+        # Bulk rendering gives the same output as str.format_map
+        text = "Dear {name}, order {order} of {count} items totalling {total:.2f} ships on {date} to {city}."
+        variables = [{"name": "John", "order": i, "count": 4, "total": 99.5, "date": "2023-01-01", "city": "Paris"}
+                     for i in range(200)]
+        compiled = compile_template(text)
+        assert list(compiled.render_many(variables)) == [text.format_map(v) for v in variables], "Bulk output should match"
+        
+        test_obj.yakshaAssert("test_compiled_templates", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_compiled_templates", False, "functional")
+        pytest.fail(f"Compiled templates test failed: {str(e)}")
+
+def test_streaming_csv_reader(test_obj):
+    """Test quoting-aware CSV streaming"""
+    try:
+        document = 'id,name,note\r\n1,"Smith, J","said ""hi""\nthen left"\r\n\r\n2,Bob,plain\n'
+        expected = [["id", "name", "note"], ["1", "Smith, J", 'said "hi"\nthen left'], ["2", "Bob", "plain"]]
+        
+        # Quoted delimiters, doubled quotes and embedded newlines survive any block size
+        assert list(iter_csv_records(document)) == expected, "Should parse RFC 4180 quoting"
+        for chunk_size in (1, 4, 16):
+            assert list(iter_csv_records(io.StringIO(document), chunk_size=chunk_size)) == expected, "Records should not depend on block size"
+        
+        # Records can be grouped into batches
+        csv_data = initialize_data()[3]
+        batches = list(iter_csv_batches(csv_data, batch_size=3))
+        assert [len(batch) for batch in batches] == [3, 1], "Should yield batches of the requested size"
+        assert batches[0][1] == parse_csv_line(csv_data.split("\n")[1]), "Simple lines should match parse_csv_line"
+        
+        test_obj.yakshaAssert("test_streaming_csv_reader", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_streaming_csv_reader", False, "functional")
+        pytest.fail(f"Streaming CSV reader test failed: {str(e)}")
+
+def test_streaming_table_writer(test_obj):
+    """Test writing tables line by line to a sink"""
+    try:
+        headers = ["Name", "Age"]
+        rows = [["John", "30"], ["Alice", 25]]
+        
+        # Lists, one-shot iterators and generators all give the same table
+        for source in (rows, iter(rows), (row for row in rows)):
+            sink = io.StringIO()
+            assert write_text_table(headers, source, sink) == 2, "Should return the number of rows written"
+            assert sink.getvalue() == format_text_table(headers, rows), "Output should match format_text_table"
+        
+        # Width hints skip the pre-pass
+        sink = io.StringIO()
+        write_text_table(headers, iter(rows), sink, col_widths=[5, 3])
+        assert sink.getvalue() == format_text_table(headers, rows), "Matching width hints should give the same table"
+        
+        with pytest.raises(ValueError):
+            write_text_table(headers, iter([["John"]]), io.StringIO())
+        
+        test_obj.yakshaAssert("test_streaming_table_writer", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_streaming_table_writer", False, "functional")
+        pytest.fail(f"Streaming table writer test failed: {str(e)}")
+
+def test_bulk_vowel_consonant_counting(test_obj):
+    """Test that bulk counting matches a character-by-character count"""
+    try:
+        def reference_count(text):
+            vowels = consonants = 0
+            for char in text.lower():
+                if char.isalpha():
+                    if char in "aeiou":
+                        vowels += 1
+                    else:
+                        consonants += 1
+            return (vowels, consonants)
+        
+        samples = list(initialize_data()) + ["", "AEIOU xyz 123 !?", "Caf\u00e9 \u00c9t\u00e9 na\u00efve", "\u03a3\u03bf\u03c6\u03af\u03b1"]
+        for sample in samples:
+            assert count_vowels_and_consonants(sample) == reference_count(sample), f"Counts should match for {sample!r}"
+        
+        # ASCII input longer than one bulk slice
+        long_text = "The quick brown fox jumps over the lazy dog. " * 30000
+        assert count_vowels_and_consonants(long_text) == reference_count(long_text), "Counts should match across slices"
+        
+        test_obj.yakshaAssert("test_bulk_vowel_consonant_counting", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_bulk_vowel_consonant_counting", False, "functional")
+        pytest.fail(f"Bulk vowel and consonant counting test failed: {str(e)}")
+
+def test_suffix_index(test_obj, tmp_path):
+    """Test repeated substring queries through a suffix array index"""
+    try:
+        text = initialize_data()[0] + " The end of the story."
+        index = SuffixIndex(text)
+        
+        for pattern in ["the", "The", "o", " ", "fox", "missing"]:
+            assert index.find_all(pattern) == find_all_occurrences(text, pattern), f"Positions for '{pattern}' should match find_all_occurrences"
+            assert index.count(pattern) == len(find_all_occurrences(text, pattern)), "Count should match the number of positions"
+        assert index.find_all("aa") == [] and SuffixIndex("aaaa").find_all("aa") == [0, 1, 2], "Overlapping matches should be found"
+        assert index.replace("the", "a") == replace_substring(text, "the", "a"), "Replace should match replace_substring"
+        
+        # The integer-rank build must match a direct sort of the suffixes,
+        # including repeats, NUL characters and code points outside the BMP
+        import text_processor
+        rng = random.Random(9)
+        for sample in ["banana", "a" * 40, "ab\0" * 20 + "a", "é☃\U0001F600" * 15] + \
+                ["".join(rng.choice("ab \0é") for _ in range(rng.randint(1, 300))) for _ in range(50)]:
+            expected = sorted(range(len(sample)), key=lambda i: sample[i:])
+            assert list(text_processor._build_suffix_array(sample)) == expected, f"Suffix order should be exact for {sample[:20]!r}"
+        
+        # A saved index is memory-mapped when loaded
+        path = str(tmp_path / "sample.idx")
+        index.save(path)
+        with SuffixIndex.load(path) as loaded:
+            assert loaded.text == text, "Loaded index should keep the text"
+            assert loaded.find_all("the") == index.find_all("the"), "Loaded index should answer the same queries"
+            assert loaded.find_all(".") == find_all_occurrences(text, "."), "Matches at the end of the text should be found"
+        
+        # Truncated or corrupted files are rejected with ValueError
+        data = (tmp_path / "sample.idx").read_bytes()
+        damaged = [data[:n] for n in (0, 8, 16, len(data) - 8, len(data) - 3)]
+        damaged.append(data[:8] + (len(text) + 1).to_bytes(8, "little") + data[16:])
+        damaged.append(data + b"\0" * 5)
+        for number, content in enumerate(damaged):
+            (tmp_path / f"damaged{number}.idx").write_bytes(content)
+            with pytest.raises(ValueError):
+                SuffixIndex.load(str(tmp_path / f"damaged{number}.idx"))
+        
+        test_obj.yakshaAssert("test_suffix_index", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_suffix_index", False, "functional")
+        pytest.fail(f"Suffix index test failed: {str(e)}")
+
+def test_bulk_replacement(test_obj):
+    """Test applying many replacements in one scan"""
+    try:
+        # Every replacement is applied in the same pass
+        result = replace_substrings("the cat sat on the mat", {"the": "a", "cat": "dog", "mat": "rug"})
+        assert result == "a dog sat on a rug", "Should apply all replacements"
+        
+        # Leftmost-longest conflict resolution, independent of mapping order
+        assert replace_substrings("abcd", {"ab": "1", "abc": "2", "cd": "3"}) == "2d", "Longest match at a position should win"
+        assert replace_substrings("abcd", {"cd": "3", "bcd": "4", "ab": "1"}) == "13", "Leftmost match should win"
+        assert replace_substrings("abcdy", {"abcdx": "!", "b": "B", "c": "C"}) == "aBCdy", "A failed longer match should not hide shorter ones"
+        
+        # The scan matches a direct leftmost-longest search on random inputs
+        rng = random.Random(5)
+        for _ in range(300):
+            mapping = {"".join(rng.choice("abc") for _ in range(rng.randint(1, 4))): str(rng.randint(0, 99))
+                       for _ in range(rng.randint(1, 6))}
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 40)))
+            expected, position = [], 0
+            while position < len(text):
+                old = max((old for old in mapping if text.startswith(old, position)), key=len, default=None)
+                expected.append(text[position] if old is None else mapping[old])
+                position += 1 if old is None else len(old)
+            assert replace_substrings(text, mapping) == "".join(expected), f"Replacements in {text!r} should be leftmost-longest"
+
+        # Replacements are not rescanned and special characters are literal
+        assert replace_substrings("a.b", {".": "..", "a": "b", "b": "a"}) == "b..a", "Replaced text should not be rescanned"
+        assert replace_substrings("hello", {}) == "hello", "Empty mapping should leave text unchanged"
+        assert replace_substrings("apple apple", {"apple": "orange"}) == replace_substring("apple apple", "apple", "orange"), "Single replacement should match replace_substring"
+        
+        test_obj.yakshaAssert("test_bulk_replacement", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_bulk_replacement", False, "functional")
+        pytest.fail(f"Bulk replacement test failed: {str(e)}")
+
+def test_script_mode(test_obj, tmp_path):
+    """Test running commands from a script without prompts"""
+    try:
+        sample = tmp_path / "sample.txt"
+        sample.write_text("hello world, mail a@b.com on 2023-01-02", encoding="utf-8")
+        script = [
+            "# comments and blank lines are skipped",
+            "",
+            f"words {sample}",
+            f'replace {sample} "hello world" hi',
+            f"substring {sample} 0 5",
+            f"dates {sample}",
+            f"unknown {sample}",
+        ]
+        
+        # One JSON result per command
+        output = io.StringIO()
+        assert run_script(script, output, machine_readable=True) == 1, "Should return the number of failed commands"
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert [r["line"] for r in results] == [3, 4, 5, 6, 7], "Should report one result per command"
+        assert results[0]["result"] == 6, "words should run count_words"
+        assert results[1]["result"] == "hi, mail a@b.com on 2023-01-02", "replace should accept quoted arguments"
+        assert results[2]["result"] == "hello", "substring should convert index arguments"
+        assert results[3]["result"] == ["2023-01-02"], "dates should run extract_dates"
+        assert results[4]["ok"] is False and "Unknown command" in results[4]["error"], "Unknown commands should be reported"
+        
+        # Plain output keeps each result on a single line
+        output = io.StringIO()
+        run_script([f"upper {sample}"], output)
+        assert output.getvalue() == "1: upper: 'HELLO WORLD, MAIL A@B.COM ON 2023-01-02'\n", "Plain output should show the result"
+        
+        test_obj.yakshaAssert("test_script_mode", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_script_mode", False, "functional")
+        pytest.fail(f"Script mode test failed: {str(e)}")
+
+def test_instrumentation(test_obj):
+    """Test opt-in per-function timing and call counting"""
+    try:
+        import text_processor
+        original = text_processor.count_words
+        reset_instrumentation()
+        enable_instrumentation()
+        try:
+            text_processor.count_words("one two three")
+            text_processor.count_words("four")
+            with pytest.raises(ValueError):
+                text_processor.count_words(None)
+        finally:
+            disable_instrumentation()
+        
+        stats = get_instrumentation_stats()["count_words"]
+        assert stats["calls"] == 3 and stats["errors"] == 1, "Should count calls and failures"
+        assert stats["total_input_bytes"] == 17 and stats["max_input_bytes"] == 13, "Should record input sizes"
+        assert 0 <= stats["p50_seconds"] <= stats["p99_seconds"], "Should report latency percentiles"
+        assert "count_words" in format_instrumentation_stats(), "Stats should be printable as a table"
+        assert "format_text_table" not in get_instrumentation_stats(), "Printing stats should not be recorded"
+        
+        # Sizes are UTF-8 bytes, generators are timed across their steps, and
+        # the caller's random state is left alone
+        random.seed(7)
+        expected = random.random()
+        random.seed(7)
+        reset_instrumentation()
+        enable_instrumentation()
+        try:
+            text_processor.count_characters("\u00e9t\u00e9")
+            assert list(text_processor.iter_split("a,b,c", ",")) == ["a", "b", "c"]
+            for _ in range(text_processor._LATENCY_SAMPLE_SIZE + 10):
+                text_processor.count_characters("x")
+        finally:
+            disable_instrumentation()
+        stats = get_instrumentation_stats()
+        assert stats["count_characters"]["max_input_bytes"] == 5, "Non-ASCII text should be measured in bytes"
+        assert stats["iter_split"]["calls"] == 1 and stats["iter_split"]["total_input_bytes"] == 6, "Generators should be recorded once"
+        assert random.random() == expected, "Latency sampling should not use the global random state"
+        
+        # Disabling restores the original functions
+        assert text_processor.count_words is original, "Disabled instrumentation should have no wrappers"
+        reset_instrumentation()
+        assert get_instrumentation_stats() == {}, "Reset should discard the stats"
+        
+        test_obj.yakshaAssert("test_instrumentation", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_instrumentation", False, "functional")
+        pytest.fail(f"Instrumentation test failed: {str(e)}")
+
+def test_sample_registry(test_obj, tmp_path):
+    """Test file-backed samples loaded lazily through mmap"""
+    try:
+        (tmp_path / "notes.txt").write_text("Meeting on 2023-05-15", encoding="utf-8")
+        (tmp_path / "logs").mkdir()
+        (tmp_path / "logs" / "app.log").write_text("[2023-03-15 08:45:32] INFO: ok", encoding="utf-8")
+        (tmp_path / "empty.txt").write_text("", encoding="utf-8")
+        
+        # Built-in samples keep the menu order of initialize_data()
+        registry = create_sample_registry()
+        assert len(registry) == 11 and registry.names()[0] == "Plain Text", "Built-in samples should be registered"
+        assert registry.get_text("CSV Data") == initialize_data()[3], "Built-in sample text should be unchanged"
+        
+        registry.register_file("notes", str(tmp_path / "notes.txt"))
+        names = registry.register_directory(str(tmp_path), prefix="dir:")
+        assert names == ["dir:empty.txt", "dir:notes.txt", "dir:logs/app.log"], "Directories should be walked recursively"
+        
+        # The first use maps the file; later uses reuse the same buffer and text
+        buffer = registry.get_buffer("notes")
+        text = registry.get_text("notes")
+        assert text == "Meeting on 2023-05-15", "File sample should be decoded as UTF-8"
+        assert registry.get_buffer("notes") is buffer and registry.get_text("notes") is text, "Loaded samples should be reused"
+        assert extract_dates(registry.get_text("dir:logs/app.log")) == ["2023-03-15"], "File samples should work with the text functions"
+        assert registry.get_text("dir:empty.txt") == "", "Empty files should load as empty text"
+        registry.close()
+        
+        with pytest.raises(ValueError):
+            registry.get_text("missing")
+        
+        test_obj.yakshaAssert("test_sample_registry", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_sample_registry", False, "functional")
+        pytest.fail(f"Sample registry test failed: {str(e)}")
+
+def test_text_document_statistics(test_obj):
+    """Test statistics kept up to date across edits"""
+    try:
+        def expected_stats(text):
+            vowels, consonants = count_vowels_and_consonants(text)
+            lines = text.count("\n") + (1 if text and not text.endswith("\n") else 0)
+            return {"characters": count_characters(text), "words": count_words(text),
+                    "vowels": vowels, "consonants": consonants, "lines": lines}
+        
+        document = TextDocument("The quick brown fox")
+        assert document.stats() == expected_stats("The quick brown fox"), "Initial statistics should be correct"
+        
+        # Edits that join, split and remove words
+        document.append("es jump")
+        document.insert(4, "very ")
+        document.replace(0, 4, "A\n")
+        document.delete(7, 9)
+        document.insert(len(document), " high\n")
+        assert document.text == "A\nvery ick brown foxes jump high\n", "Edits should change the text"
+        assert document.stats() == expected_stats(document.text), "Statistics should match a full recount"
+        assert document.word_count == 7 and document.line_count == 2, "Word and line counts should be maintained"
+        
+        # Edits on a document of many chunks, including ones spanning chunks
+        reference = "lorem ipsum dolor\n" * 20000
+        large = TextDocument(reference)
+        for position, length, insert in [(5, 0, "X"), (70000, 40000, " joined "), (len(reference) - 50, 50, ""),
+                                         (0, 3, "\n\n"), (123456, 1, "word word")]:
+            position = min(position, len(reference))
+            end = min(position + length, len(reference))
+            large.replace(position, end, insert)
+            reference = reference[:position] + insert + reference[end:]
+        assert large.get_text(69990, 70030) == reference[69990:70030], "Slices should span chunks"
+        assert large.text == reference and large.stats() == expected_stats(reference), "Chunked edits should match a recount"
+        
+        # Deleting everything brings the counts back to zero
+        document.delete(0, len(document))
+        assert document.stats() == expected_stats(""), "Empty document should have zero counts"
+        
+        with pytest.raises(ValueError):
+            document.insert(5, "x")
+        
+        test_obj.yakshaAssert("test_text_document_statistics", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_text_document_statistics", False, "functional")
+        pytest.fail(f"Text document statistics test failed: {str(e)}")
+
+def test_bounded_palindrome_checks(test_obj, tmp_path):
+    """Test the block-wise palindrome checks against is_palindrome"""
+    try:
+        samples = [
+            "", "a", ".,", "racecar", "A man, a plan, a canal: Panama",
+            "Was it a car or a cat I saw?", "No lemon, no melon", "hello world",
+            "Ésope reste ici et se repose", "abc" + "x" * 100 + "cba", "ab" + "x" * 100 + "cba"
+        ]
+        
+        for sample in samples:
+            expected = is_palindrome(sample)
+            for block_size in (1, 3, 64):
+                assert is_palindrome_two_pointer(sample, block_size) == expected, f"Mismatch for {sample!r}"
+            
+            path = tmp_path / "sample.txt"
+            path.write_text(sample, encoding="utf-8")
+            for block_size in (1, 2, 5, 64):
+                assert is_palindrome_file(str(path), block_size) == expected, f"File mismatch for {sample!r}"
+        
+        with pytest.raises(ValueError):
+            is_palindrome_two_pointer("abc", 0)
+        
+        test_obj.yakshaAssert("test_bounded_palindrome_checks", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_bounded_palindrome_checks", False, "functional")
+        pytest.fail(f"Bounded palindrome checks test failed: {str(e)}")
+
+def test_streaming_extractors(test_obj):
+    """Test streaming email and date extraction with offsets and line numbers"""
+    try:
+        text = ("[2023-03-15 08:45:32] INFO: mail from (alice@example.com), ok\n"
+                "no hits on this line\n"
+                "bob@test.org wrote on 2024-01-31; see 2024-13-01\n")
+        
+        emails = list(iter_email_addresses(text))
+        assert [email for email, _, _ in emails] == extract_email_addresses(text), "Should find the same emails"
+        assert emails[0] == ("alice@example.com", text.index("alice"), 1), "Offset should point at the address"
+        assert emails[1] == ("bob@test.org", text.index("bob"), 3), "Line numbers should be 1-based"
+        
+        dates = list(iter_dates(text))
+        assert [date for date, _, _ in dates] == extract_dates(text), "Should find the same dates"
+        assert dates[-1] == ("2024-01-31", text.index("2024-01-31"), 3), "Date offset and line should be reported"
+        
+        # Matches split across chunk boundaries are found once, with the same positions
+        for chunk_size in (1, 5, 17):
+            assert list(iter_email_addresses(io.StringIO(text), chunk_size)) == emails, "Chunked emails should match"
+            assert list(iter_dates(io.BytesIO(text.encode("utf-8")), chunk_size)) == dates, "Chunked dates should match"
+        
+        # Non-ASCII whitespace also ends a carried token, so matches are
+        # yielded while the source is still being read
+        spaced = "　".join(["a@b.com", "2023-05-15", "word"] * 2000) + " end "
+        read = []
+        def chunks():
+            for start in range(0, len(spaced), 64):
+                read.append(start)
+                yield spaced[start:start + 64]
+        first = next(iter_email_addresses(chunks(), 64))
+        assert first == ("a@b.com", 0, 1) and len(read) <= 2, "Matches should not wait for ASCII whitespace"
+        assert [email for email, _, _ in iter_email_addresses(spaced, 64)] == extract_email_addresses(spaced), \
+            "Unicode whitespace should separate words"
+        
+        # A token longer than MAX_TOKEN_LENGTH is dropped rather than carried
+        long_text = "x@y.com " + "a" * (MAX_TOKEN_LENGTH + 10) + "@b.com c@d.com\n2023-05-15"
+        assert list(iter_email_addresses(long_text, 4096)) == [("x@y.com", 0, 1), ("c@d.com", long_text.index("c@d"), 1)], \
+            "Overlong tokens should be skipped with later offsets intact"
+        assert list(iter_dates(io.StringIO(long_text), 4096)) == [("2023-05-15", long_text.index("2023"), 2)], \
+            "Lines should be counted past a skipped token"
+        
+        test_obj.yakshaAssert("test_streaming_extractors", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_streaming_extractors", False, "functional")
+        pytest.fail(f"Streaming extractors test failed: {str(e)}")
+
+def test_log_parsing(test_obj, tmp_path):
+    """Test columnar log parsing with level filtering and worker processes"""
+    try:
+        data = initialize_data()
+        entry = parse_log_line(data[5])
+        assert entry == {"timestamp": "2023-03-15 08:45:32", "level": "INFO",
+                         "message": "User login successful", "fields": {"username": "admin"}}, "Sample log line should parse"
+        
+        lines = []
+        for i in range(200):
+            level = ("INFO", "WARNING", "ERROR")[i % 3]
+            extra = f" code={i}" if level == "ERROR" else ""
+            lines.append(f"[2023-03-15 08:{i // 60:02d}:{i % 60:02d}] {level}: Request {i} - user=u{i}{extra}\n")
+        lines.insert(10, "not a log line\n")
+        text = "".join(lines)
+        
+        columns = parse_log_stream(io.StringIO(text), chunk_size=64)
+        assert len(columns) == 200 and columns.skipped == 1, "Every log line should be parsed once"
+        assert columns.messages[4] == "Request 4", "Message should exclude the key=value pairs"
+        assert columns.field("user")[199] == "u199", "Field columns should be aligned with the rows"
+        assert columns.field("code")[:3] == [None, None, "2"], "Missing fields should be None"
+        assert columns.level_counts() == {"INFO": 67, "WARNING": 67, "ERROR": 66}, "Levels should be counted"
+        
+        # A key repeated on one line keeps its last value, as in parse_log_line
+        repeated = parse_log_stream("[2023-03-15 08:45:32] INFO: a - k=1 k=2\n[2023-03-15 08:45:33] INFO: b - k=3\n")
+        assert repeated.field("k") == ["2", "3"], "Repeated keys should not shift later rows"
+        assert parse_log_line("[2023-03-15 08:45:32] INFO: a - k=1 k=2")["fields"] == {"k": "2"}, "Last value should win"
+        
+        errors = parse_log_stream(text, levels=["ERROR"])
+        assert errors.levels == ["ERROR"] * 66 and errors.skipped == 1, "Only the requested levels should be kept"
+        assert errors.field("code") == [str(i) for i in range(2, 200, 3)], "Filtered rows should keep their fields"
+        
+        path = tmp_path / "app.log"
+        path.write_text(text, encoding="utf-8")
+        parallel = parse_log_file(str(path), workers=2, range_size=1024)
+        assert parallel.timestamps == columns.timestamps, "Ranges should be merged in file order"
+        assert parallel.field("code") == columns.field("code") and parallel.skipped == 1, "Columns should match"
+        
+        with pytest.raises(ValueError):
+            parse_log_line("not a log line")
+        
+        test_obj.yakshaAssert("test_log_parsing", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_log_parsing", False, "functional")
+        pytest.fail(f"Log parsing test failed: {str(e)}")
+
+def test_json_path_streaming(test_obj):
+    """Test incremental extraction of values at a JSON path"""
+    try:
+        json_data = initialize_data()[4]
+        assert list(iter_json_path(json_data, "users[*].name")) == ["Alice", "Bob", "Carol"], "Should stream every name"
+        assert list(iter_json_path(json_data, "users[1]")) == [{"id": 2, "name": "Bob"}], "Should select one element"
+        assert list(iter_json_path(json_data, "$.users[*].email")) == [], "Missing keys should yield nothing"
+        assert list(map_json_path(json_data, "users[*].name", to_uppercase)) == ["ALICE", "BOB", "CAROL"], \
+            "Values should feed the text functions"
+        
+        # Values and skipped data split across tiny chunks
+        document = json.dumps({
+            "meta": {"note": "brackets ] and } in \"strings\"", "sizes": [1.5e10, -2, None]},
+            "users": [{"id": i, "name": f"User {i}", "tags": ["x", {"y": [i]}]} for i in range(50)],
+        })
+        for chunk_size in (1, 3, 64):
+            names = list(iter_json_path(io.StringIO(document), "users[*].name", chunk_size))
+            assert names == [f"User {i}" for i in range(50)], "Chunked names should match"
+            assert list(iter_json_path(io.StringIO(document), "meta.sizes[*]", chunk_size)) == [1.5e10, -2, None], \
+                "Numbers split across chunks should decode whole"
+        
+        assert sum(map_json_path(document, "users[*].name", count_characters)) == sum(
+            len(f"User {i}") for i in range(50)), "Mapped results should be yielded in order"
+        
+        with pytest.raises(ValueError):
+            list(iter_json_path('{"users": [{"name": "A"} {"name": "B"}]}', "users[*].name"))
+        
+        with pytest.raises(ValueError):
+            list(iter_json_path(json_data, "users[*"))
+        
+        test_obj.yakshaAssert("test_json_path_streaming", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_json_path_streaming", False, "functional")
+        pytest.fail(f"JSON path streaming test failed: {str(e)}")
+
+def test_text_service(test_obj):
+    """Test the local text service with batching and back-pressure on localhost"""
+    try:
+        async def scenario():
+            service = text_service.TextService(workers=1, batch_size=16, batch_delay=0.01,
+                                               max_pending=4, max_in_flight=8)
+            host, port = await service.start("127.0.0.1", 0)
+            try:
+                client = await text_service.TextServiceClient.connect(host, port)
+                texts = [f"word {i} " * (i % 4) for i in range(100)]
+                counts = await asyncio.gather(*[client.call("count_words", text) for text in texts])
+                assert counts == [count_words(text) for text in texts], "Every call should get its own result"
+                assert service.request_count == 100, "All requests should be dispatched"
+                assert service.batch_count < 100, "Concurrent requests should be batched"
+                
+                assert await client.call("count_vowels_and_consonants", "hello") == [2, 3], "Tuples arrive as lists"
+                assert await client.call("format_text_with_variables", "Hi {name}", name="Ann") == "Hi Ann", \
+                    "Keyword arguments should be passed through"
+                with pytest.raises(ValueError):
+                    await client.call("count_words", None)
+                with pytest.raises(ValueError):
+                    await client.call("run_script", [])
+                await client.close()
+                
+                # The raw protocol is one JSON object per line
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(b'{"id": "a", "function": "to_uppercase", "args": ["abc"]}\nnot json\n')
+                await writer.drain()
+                responses = [json.loads(await reader.readline()) for _ in range(2)]
+                responses.sort(key=lambda response: response["id"] is None)
+                assert responses[0] == {"id": "a", "ok": True, "result": "ABC"}, "Valid request should succeed"
+                assert responses[1]["id"] is None and not responses[1]["ok"], "Invalid JSON should be reported"
+                writer.close()
+                await writer.wait_closed()
+            finally:
+                await service.close()
+        
+        asyncio.run(scenario())
+        
+        with pytest.raises(ValueError):
+            text_service.TextService(batch_size=0)
+        
+        test_obj.yakshaAssert("test_text_service", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_text_service", False, "functional")
+        pytest.fail(f"Text service test failed: {str(e)}")
+
+def test_result_cache(test_obj, tmp_path):
+    """Test the content-hashed result cache, its memory budget and persistence"""
+    try:
+        calls = []
+        def counted_words(text):
+            calls.append(text)
+            return count_words(text)
+        
+        cache = ResultCache()
+        text = "the quick brown fox " * 50
+        assert cache.call(counted_words, text) == 200, "Miss should compute the result"
+        assert cache.call(counted_words, "".join(["the quick brown fox "] * 50)) == 200, "Equal text should hit"
+        assert len(calls) == 1, "Hit should not recompute"
+        assert cache.call(find_all_occurrences, text, "fox") != cache.call(find_all_occurrences, text, "the"), \
+            "Arguments should be part of the key"
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3, "Hits and misses should be counted"
+        
+        # Lambdas and closures are told apart by the function object, not the name
+        assert cache.call(lambda t: 1, text) == 1 and cache.call(lambda t: 2, text) == 2, "Lambdas should not share results"
+        def make(value):
+            return lambda t: value
+        assert cache.call(make(1), text) == 1 and cache.call(make(2), text) == 2, "Closures should not share results"
+        
+        # A small budget keeps only the most recently used results
+        small = ResultCache(max_bytes=2000)
+        for i in range(20):
+            small.call(to_uppercase, f"text number {i}")
+        small.call(to_uppercase, "text number 19")
+        stats = small.stats()
+        assert stats["bytes"] <= 2000 and stats["evictions"] > 0, "Budget should be enforced"
+        assert stats["hits"] == 1 and len(small) < 20, "Most recent entry should survive eviction"
+        
+        # Results of module-level functions survive across runs through the
+        # cache file; nested functions and lambdas are not saved
+        cache.call(count_words, text)
+        path = str(tmp_path / "results.cache")
+        cache.save(path)
+        reloaded = ResultCache(path=path)
+        assert len(reloaded) == 3, "Only entries of module-level functions should be saved"
+        assert reloaded.call(count_words, text) == 200 and reloaded.stats()["hits"] == 1, "Loaded entries should hit"
+        reloaded.call(counted_words, text)
+        assert len(calls) == 2, "Nested functions should not be loaded"
+        
+        # Scripts share one cache across commands
+        sample = tmp_path / "sample.txt"
+        sample.write_text(text, encoding="utf-8")
+        script_cache = ResultCache()
+        run_script([f"words {sample}", f"words {sample}", f"find {sample} fox"], output=io.StringIO(),
+                   cache=script_cache)
+        assert script_cache.stats()["hits"] == 1 and script_cache.stats()["misses"] == 2, "Repeats should hit"
+        
+        # Functions as cheap as hashing the text bypass the cache
+        run_script([f"chars {sample}", f"upper {sample}", f"strip {sample}"], output=io.StringIO(), cache=script_cache)
+        assert script_cache.stats()["misses"] == 2 and len(script_cache) == 2, "Cheap commands should not be cached"
+        
+        # A hit on a text object seen before reuses its remembered digest
+        large = "word " * 2000000
+        cache.call(count_words, large)
+        remembered = cache._digests[id(large)]
+        assert cache.call(count_words, large) == 2000000, "Large text should hit"
+        assert cache._digests[id(large)] is remembered, "Hit should not hash the text again"
+        
+        # Remembered texts count against the budget and never pin more than half of it
+        assert cache.stats()["bytes"] >= sys.getsizeof(large), "Remembered text should be counted"
+        bounded = ResultCache(max_bytes=1000000)
+        bounded.call(count_words, large)
+        assert not bounded._digests and bounded.stats()["bytes"] < 1000000, "A text over half the budget should not be held"
+        
+        (tmp_path / "bad.cache").write_bytes(b"not a cache")
+        with pytest.raises(ValueError):
+            ResultCache(path=str(tmp_path / "bad.cache"))
+        
+        test_obj.yakshaAssert("test_result_cache", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_result_cache", False, "functional")
+        pytest.fail(f"Result cache test failed: {str(e)}")
+
+def test_text_view(test_obj, tmp_path):
+    """Test zero-copy views over byte buffers and memory-mapped files"""
+    try:
+        text = "  h\u00e9llo\u3000w\u00f6rld\x1c x\n\t the end  "
+        view = TextView(text.encode("utf-8"))
+        
+        # Slices are views sharing the original buffer
+        part = extract_substring(view, 2, 8)
+        assert isinstance(part, TextView), "Slicing a view should give a view"
+        assert part._view.obj is view._view.obj, "Slices should not copy the buffer"
+        assert str(part) == "h\u00e9llo" and part == "h\u00e9llo", "Slices should decode to the text"
+        
+        # Splitting and counting agree with the str functions
+        assert [str(p) for p in split_text(view)] == text.split(), "Whitespace split should match str.split"
+        assert [str(p) for p in split_text(view, "l")] == text.split("l"), "Delimiter split should match str.split"
+        assert count_words(view) == count_words(text), "Word counts should match"
+        assert count_characters(view) == count_characters(text), "Character counts should match"
+        assert count_vowels_and_consonants(view) == count_vowels_and_consonants(text), "Letter counts should match"
+        assert view.find("w\u00f6rld") == text.encode("utf-8").find("w\u00f6rld".encode("utf-8")), "find should give byte offsets"
+        
+        # Memory-mapped files are viewed in place, across chunk boundaries
+        path = tmp_path / "large.txt"
+        large = "w\u00f6rd " * 200000 + "end"
+        path.write_text(large, encoding="utf-8")
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            mapped_view = TextView(mapped)
+            assert count_words(mapped_view) == 200001, "Words should be counted across chunks"
+            assert count_characters(mapped_view) == len(large), "Characters should be counted across chunks"
+            assert str(mapped_view[-3:]) == "end", "Negative slices should work"
+            mapped_view.release()
+        
+        with pytest.raises(ValueError):
+            TextView(b"text", 3, 2)
+        with pytest.raises(ValueError):
+            view.split("")
+        
+        test_obj.yakshaAssert("test_text_view", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_text_view", False, "functional")
+        pytest.fail(f"Text view test failed: {str(e)}")
+
+def test_lazy_split(test_obj):
+    """Test lazy splitting of strings, files and buffers"""
+    try:
+        text = "a,b,,c\n  d\u3000e ,f,"
+        
+        # Results match split_text for every delimiter and chunk size
+        for delimiter in [None, ",", ",,", "\n"]:
+            expected = split_text(text, delimiter)
+            for chunk_size in [1, 2, 5, 64]:
+                assert list(iter_split(io.StringIO(text), delimiter, chunk_size)) == expected, "File parts should match"
+                assert list(iter_split(text, delimiter, chunk_size)) == expected, "String parts should match"
+            assert [str(part) for part in iter_split(text.encode("utf-8"), delimiter)] == expected, "Buffer parts should match"
+        
+        # Parts are produced one at a time
+        parts = iter_split(io.StringIO("first second " + "x" * 100000), None, 16)
+        assert inspect.isgenerator(parts), "iter_split should be lazy"
+        assert next(parts) == "first" and next(parts) == "second", "Parts should come in order"
+        assert len(next(parts)) == 100000, "A part spanning many chunks should be whole"
+        
+        assert list(iter_split("", ",")) == [""], "Splitting an empty string should give one empty part"
+        assert list(iter_split("   ")) == [], "Whitespace-only text should give no parts"
+        with pytest.raises(ValueError):
+            list(iter_split("text", ""))
+        
+        test_obj.yakshaAssert("test_lazy_split", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_lazy_split", False, "functional")
+        pytest.fail(f"Lazy split test failed: {str(e)}")
+
+def test_term_frequency(test_obj):
+    """Test exact and approximate word and n-gram counting"""
+    try:
+        text = "the cat and the dog and the bird\nthe end"
+        
+        # Exact counts use the same words as count_words
+        counter = TermFrequencyCounter()
+        counter.update(io.StringIO(text), chunk_size=4)
+        assert counter.total == count_words(text), "Total should match count_words"
+        assert counter["the"] == 4 and counter["and"] == 2 and counter["fish"] == 0, "Counts should be exact"
+        assert counter.most_common(2) == [("the", 4), ("and", 2)], "Top terms should come first"
+        assert len(counter) == 6, "Every distinct word should be counted"
+        
+        # N-grams continue across update calls and sources
+        bigrams = TermFrequencyCounter(n=2)
+        bigrams.update("a b c")
+        bigrams.update("d a b".encode("utf-8"))
+        assert bigrams["a b"] == 2 and bigrams["c d"] == 1, "Bigrams should span updates"
+        assert bigrams.total == 5, "Every bigram should be counted"
+        
+        # Updates shorter than an n-gram still carry their words forward
+        fourgrams = TermFrequencyCounter(n=4)
+        for part in ["a", "b", "c d", "e"]:
+            fourgrams.update(part)
+        assert fourgrams.most_common() == [("a b c d", 1), ("b c d e", 1)], "Short updates should extend the window"
+        
+        # Approximate counts stay within capacity and bound the true counts
+        words = ["w%d" % (i % 7 if i % 3 else i) for i in range(3000)]
+        approximate = SpaceSavingCounter(capacity=20)
+        approximate.update(" ".join(words))
+        exact = TermFrequencyCounter()
+        exact.update(" ".join(words))
+        assert len(approximate) <= 20, "Tracked terms should not exceed capacity"
+        for term, count in exact.most_common(7):
+            assert approximate[term] - approximate.error(term) <= count <= approximate[term], "Counts should be bounded"
+        assert {term for term, _ in approximate.most_common(7)} == {"w%d" % i for i in range(7)}, "Heavy hitters should be found"
+        
+        with pytest.raises(ValueError):
+            TermFrequencyCounter(n=0)
+        with pytest.raises(ValueError):
+            SpaceSavingCounter(capacity=0)
+        
+        test_obj.yakshaAssert("test_term_frequency", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_term_frequency", False, "functional")
+        pytest.fail(f"Term frequency test failed: {str(e)}")
+
+def test_streaming_case_conversion(test_obj, tmp_path):
+    """Test case conversion from a stream into a sink"""
+    try:
+        text = "hello WORLD o'neil stra\u00dfe \u039f\u0394\u039f\u03a3 \u01c6x\n" + "abc" * 50 + " end"
+        
+        # Output matches the whole-text functions for every chunk size
+        for stream_function, function in [(to_uppercase_stream, to_uppercase),
+                                          (to_lowercase_stream, to_lowercase),
+                                          (capitalize_text_stream, capitalize_text)]:
+            for chunk_size in [1, 3, 7, 64]:
+                sink = io.StringIO()
+                written = stream_function(io.StringIO(text), sink, chunk_size)
+                assert sink.getvalue() == function(text), f"{function.__name__} should match with chunk size {chunk_size}"
+                assert written == len(function(text)), "The number of characters written should be returned"
+        
+        # Words straddling a chunk boundary keep title() semantics
+        sink = io.StringIO()
+        capitalize_text_stream(["hel", "lo wo", "rld"], sink)
+        assert sink.getvalue() == "Hello World", "Split words should be capitalized once"
+        
+        # Files are converted to files
+        source_path = tmp_path / "input.txt"
+        target_path = tmp_path / "output.txt"
+        source_path.write_text("line one\nline two\n", encoding="utf-8")
+        with open(source_path, encoding="utf-8") as source, open(target_path, "w", encoding="utf-8") as sink:
+            to_uppercase_stream(source, sink, chunk_size=4)
+        assert target_path.read_text(encoding="utf-8") == "LINE ONE\nLINE TWO\n", "Files should be converted"
+        
+        with pytest.raises(ValueError):
+            to_uppercase_stream("text", None)
+        
+        test_obj.yakshaAssert("test_streaming_case_conversion", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_streaming_case_conversion", False, "functional")
+        pytest.fail(f"Streaming case conversion test failed: {str(e)}")
+
 if __name__ == '__main__':
     pytest.main(['-v'])
\ No newline at end of file
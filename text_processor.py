@@ -3,6 +3,115 @@ Text Processing System
 This program demonstrates string operations, slicing, and methods through text processing.
 """
 
+import argparse
+import bisect
+import codecs
+import csv
+import functools
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import pickle
+import random
+import re
+import shlex
+import string
+import struct
+import sys
+import tempfile
+import time
+import types
+import unicodedata
+from array import array
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, islice
+
+# Size of the buffers read by the streaming (file/iterator) functions
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# A word is a run of non-whitespace characters, exactly as str.split() sees it
+_WORD_PATTERN = re.compile(r'\S+')
+
+# Punctuation stripped from words before email and date extraction
+_TOKEN_PUNCTUATION = ',.;:\'\"()[]{}'
+
+# Tokens worth checking with _is_email_address / _is_date
+_EMAIL_CANDIDATE_PATTERN = re.compile(r'(?<!\S)\S*@\S*')
+_DATE_CANDIDATE_PATTERN = re.compile(r'(?<!\S)\S*-\S\S-\S*')
+
+# First whitespace character, and everything up to the last one; \s matches
+# exactly the characters for which str.isspace() is true
+_WHITESPACE_PATTERN = re.compile(r'\s')
+_THROUGH_LAST_WHITESPACE_PATTERN = re.compile(r'.*\s', re.DOTALL)
+
+# Tokens longer than this, or than the chunk size if that is larger, are
+# skipped by the streaming extractors instead of being held in memory
+MAX_TOKEN_LENGTH = 64 * 1024
+
+# Building blocks of the incremental JSON scanner
+_JSON_PATH_STEP = re.compile(r'\.?([^.\[\]]+)|\[(\*|\d+)\]')
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_JSON_STRUCTURE = re.compile(r'"(?:[^"\\]*(?:\\.[^"\\]*)*")?|[\[\]{}]', re.DOTALL)
+_JSON_SCALAR_END = re.compile(r'[,\]}\s]')
+_JSON_DECODER = json.JSONDecoder()
+
+# Log lines look like "[2023-03-15 08:45:32] INFO: message - key=value"
+_LOG_LINE_PATTERN = re.compile(r'\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] ([A-Za-z]+): ?(.*)')
+
+# Approximate bytes of a log file parsed by each worker task
+LOG_RANGE_SIZE = 16 * 1024 * 1024
+
+# Runs of UTF-8 encoded whitespace; every character with isspace() is below U+3001
+_UTF8_WHITESPACE = [chr(c).encode('utf-8') for c in range(0x3001) if chr(c).isspace()]
+_UTF8_WHITESPACE_RUN = re.compile(
+    b'(?:[' + re.escape(b''.join(c for c in _UTF8_WHITESPACE if len(c) == 1)) + b']|'
+    + b'|'.join(re.escape(c) for c in _UTF8_WHITESPACE if len(c) > 1) + b')+')
+
+# Byte tables for counting ASCII letters with bytes.translate()
+_ASCII_LOWER = bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ', b'abcdefghijklmnopqrstuvwxyz')
+_ASCII_NON_LETTERS = bytes(c for c in range(256) if not (c < 128 and chr(c).isalpha()))
+_ASCII_NON_ALNUM = bytes(c for c in range(256) if not (c < 128 and chr(c).isalnum()))
+
+# Characters examined per step at each end by the block palindrome checks
+PALINDROME_BLOCK_SIZE = 64 * 1024
+
+# Characters per chunk of a TextDocument
+DOCUMENT_CHUNK_SIZE = 16 * 1024
+
+# Words counted together in one step by the term-frequency counters
+TERM_BATCH_SIZE = 64 * 1024
+
+# Header of files written by SuffixIndex.save(): magic bytes and text length
+_INDEX_MAGIC = b'TPSUFIX1'
+_INDEX_HEADER = struct.Struct('<8sQ')
+
+# Characters compared directly before SuffixIndex switches to prefix doubling
+_SUFFIX_PREFIX_LENGTH = 8
+
+# Number of parsed templates kept by compile_template
+TEMPLATE_CACHE_SIZE = 256
+
+# Default memory budget of a ResultCache, and its file format version
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+_RESULT_CACHE_VERSION = 1
+
+# Text objects whose digests a ResultCache remembers
+_RESULT_CACHE_DIGESTS = 8
+
+_FORMATTER = string.Formatter()
+_FIELD_NAME_PATTERN = re.compile(r'[^.\[]*')
+_FIELD_STEP_PATTERN = re.compile(r'\.([^.\[]+)|\[([^\]]+)\]')
+_TEMPLATE_CONVERSIONS = {'r': 'repr', 's': 'str', 'a': 'ascii'}
+_TEMPLATE_FUNCTION = '''def render(variables):
+    try:
+        return {expression}
+    except KeyError as e:
+        raise ValueError(f"Missing required variable: {{e}}")
+'''
+
 def initialize_data():
     """
     Initialize the text data with predefined strings.
@@ -41,6 +150,10 @@ def count_characters(text):
     if text is None:
         raise ValueError("Text cannot be None")
     
+    # A view holds encoded bytes, so its characters are counted after decoding
+    if isinstance(text, TextView):
+        return text._count_characters()
+    
     return len(text)
 
 def count_words(text):
@@ -56,21 +169,428 @@ def count_words(text):
     if text is None:
         raise ValueError("Text cannot be None")
     
+    if isinstance(text, TextView):
+        return text._count_words()
+    
     # Split by whitespace and count non-empty words
     words = [word for word in text.split() if word]
     return len(words)
 
+def _iter_text_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the text of a source as a sequence of non-empty string chunks.
+
+    Args:
+        source: A string, a file object opened in text or binary mode, or an
+            iterable of str/bytes chunks. Bytes are decoded as UTF-8.
+        chunk_size (int): Number of characters (or bytes) read per chunk
+
+    Yields:
+        str: Successive chunks of text
+    """
+    if source is None:
+        raise ValueError("Source cannot be None")
+
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise ValueError("Chunk size must be a positive integer")
+
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+
+    read = getattr(source, 'read', None)
+    if read is not None:
+        chunks = iter(lambda: read(chunk_size), source.read(0))
+    else:
+        chunks = iter(source)
+
+    # Multi-byte characters may be split between two binary chunks
+    decoder = None
+    for chunk in chunks:
+        if not isinstance(chunk, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+def count_characters_stream(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Count the number of characters in a file or chunk iterator.
+
+    Args:
+        source: File object or iterable of text chunks to analyze
+        chunk_size (int, optional): Buffer size used when reading files
+
+    Returns:
+        int: Number of characters
+    """
+    count = 0
+    for chunk in _iter_text_chunks(source, chunk_size):
+        count += len(chunk)
+    return count
+
+def count_words_stream(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Count the number of words in a file or chunk iterator.
+
+    Words are matched one at a time and never collected into a list, so
+    memory use depends only on the chunk size. A word split across two
+    chunks is counted once.
+
+    Args:
+        source: File object or iterable of text chunks to analyze
+        chunk_size (int, optional): Buffer size used when reading files
+
+    Returns:
+        int: Number of words
+    """
+    count = 0
+    in_word = False
+
+    for chunk in _iter_text_chunks(source, chunk_size):
+        for _ in _WORD_PATTERN.finditer(chunk):
+            count += 1
+
+        # A word continuing from the previous chunk was already counted
+        if in_word and not chunk[0].isspace():
+            count -= 1
+        in_word = not chunk[-1].isspace()
+
+    return count
+
+class TextView:
+    """
+    A read-only window onto UTF-8 text held in bytes, an mmap or a memoryview.
+    
+    Slicing a view gives another view of the same buffer without copying.
+    Offsets and lengths are in bytes, and the text is only decoded when
+    str() is called. extract_substring, split_text, count_characters,
+    count_words and count_vowels_and_consonants accept views as well as
+    strings.
+    """
+    
+    def __init__(self, buffer, start=0, end=None):
+        if buffer is None:
+            raise ValueError("Buffer cannot be None")
+        
+        try:
+            view = memoryview(buffer)
+        except TypeError:
+            raise ValueError("Buffer must be bytes, an mmap or a memoryview")
+        if view.ndim != 1 or view.itemsize != 1:
+            view = view.cast('B')
+        
+        if end is None:
+            end = len(view)
+        if not isinstance(start, int) or not isinstance(end, int) or not 0 <= start <= end <= len(view):
+            raise ValueError(f"Invalid view range {start}:{end} for {len(view)} bytes")
+        
+        self._view = view[start:end]
+    
+    def __len__(self):
+        return len(self._view)
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self._view))
+            if step != 1:
+                raise ValueError("TextView slices cannot have a step")
+            return TextView(self._view, start, max(start, stop))
+        return self._view[key]
+    
+    def __str__(self):
+        return str(self._view, 'utf-8')
+    
+    def __bytes__(self):
+        return self._view.tobytes()
+    
+    def __eq__(self, other):
+        if isinstance(other, TextView):
+            return self._view == other._view
+        if isinstance(other, (bytes, bytearray, memoryview)):
+            return self._view == other
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"TextView({len(self._view)} bytes)"
+    
+    def release(self):
+        """Release the buffer, e.g. so that an mmap under the view can be closed."""
+        self._view.release()
+    
+    def find(self, sub, start=0, end=None):
+        """
+        Find the first occurrence of a substring.
+        
+        Args:
+            sub (str): Substring to find
+            start (int, optional): Byte offset to start searching at
+            end (int, optional): Byte offset to stop searching at
+        
+        Returns:
+            int: Byte offset of the occurrence, or -1 if not found
+        """
+        if end is None:
+            end = len(self._view)
+        match = re.compile(re.escape(sub.encode('utf-8'))).search(self._view, start, end)
+        return -1 if match is None else match.start()
+    
+    def split(self, sep=None):
+        """
+        Split the view like str.split, without copying the parts.
+        
+        Args:
+            sep (str, optional): Separator. Defaults to None (runs of whitespace).
+        
+        Returns:
+            list: The parts, as TextViews
+        """
+        return list(self.iter_split(sep))
+    
+    def iter_split(self, sep=None):
+        """
+        Split the view like str.split, one part at a time.
+        
+        Args:
+            sep (str, optional): Separator. Defaults to None (runs of whitespace).
+        
+        Yields:
+            TextView: Successive parts
+        """
+        if sep is None:
+            pattern = _UTF8_WHITESPACE_RUN
+        elif not sep:
+            raise ValueError("empty separator")
+        else:
+            pattern = re.compile(re.escape(sep.encode('utf-8')))
+        
+        position = 0
+        for match in pattern.finditer(self._view):
+            if sep is not None or match.start() > position:
+                yield self[position:match.start()]
+            position = match.end()
+        if sep is not None or position < len(self._view):
+            yield self[position:]
+    
+    def _iter_text(self):
+        """
+        Decode the view a chunk at a time.
+        
+        Yields:
+            str: Successive chunks of the text, cut between characters
+        """
+        view = self._view
+        length = len(view)
+        start = 0
+        while start < length:
+            end = min(start + DEFAULT_CHUNK_SIZE, length)
+            # Back up so a multi-byte character is not cut in two
+            while start < end < length and 0x80 <= view[end] < 0xC0:
+                end -= 1
+            if end == start:
+                end = min(start + DEFAULT_CHUNK_SIZE, length)
+            yield str(view[start:end], 'utf-8')
+            start = end
+    
+    def _count_characters(self):
+        """Count the characters of the decoded text."""
+        return sum(len(chunk) for chunk in self._iter_text())
+    
+    def _count_words(self):
+        """Count the words of the decoded text, as str.split() sees them."""
+        count = 0
+        in_word = False
+        for chunk in self._iter_text():
+            count += len(chunk.split())
+            # A word continuing from the previous chunk was already counted
+            if in_word and not chunk[0].isspace():
+                count -= 1
+            in_word = not chunk[-1].isspace()
+        return count
+    
+    def _count_vowels_and_consonants(self):
+        """Count the vowels and consonants of the decoded text."""
+        vowel_count = 0
+        consonant_count = 0
+        for chunk in self._iter_text():
+            vowels, consonants = count_vowels_and_consonants(chunk)
+            vowel_count += vowels
+            consonant_count += consonants
+        return (vowel_count, consonant_count)
+
+class _TermCounter:
+    """
+    Shared tokenization for the term-frequency counters.
+    
+    Terms are words, as str.split() sees them, or n-grams of n consecutive
+    words joined by single spaces. An n-gram may span two update() calls.
+    """
+    
+    def __init__(self, n=1):
+        if not isinstance(n, int) or n < 1:
+            raise ValueError("n must be a positive integer")
+        
+        self.n = n
+        self.total = 0
+        self._window = []
+    
+    def update(self, source, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Count the terms of more text.
+        
+        Args:
+            source: A string, TextView, buffer, file object or iterable of text chunks
+            chunk_size (int, optional): Buffer size used when reading files
+        """
+        if source is None:
+            raise ValueError("Source cannot be None")
+        
+        if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            source = TextView(source)
+        if isinstance(source, TextView):
+            source = source._iter_text()
+        words = iter_split(source, None, chunk_size)
+        
+        n = self.n
+        while True:
+            batch = list(islice(words, TERM_BATCH_SIZE))
+            if not batch:
+                break
+            
+            if n == 1:
+                terms = batch
+            else:
+                # Carry the last n - 1 words so n-grams continue across batches
+                batch = self._window + batch
+                terms = map(' '.join, zip(*(batch[i:] for i in range(n))))
+                self._window = batch[-(n - 1):]
+            
+            counts = Counter(terms)
+            self.total += sum(counts.values())
+            self._add_counts(counts)
+    
+    def most_common(self, k=None):
+        """
+        Get the most frequent terms.
+        
+        Args:
+            k (int, optional): Number of terms to return. Defaults to None (all).
+        
+        Returns:
+            list: (term, count) pairs, most frequent first
+        """
+        if k is None:
+            return sorted(self._counts.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(k, self._counts.items(), key=lambda item: item[1])
+    
+    def __getitem__(self, term):
+        return self._counts.get(term, 0)
+    
+    def __len__(self):
+        return len(self._counts)
+
+class TermFrequencyCounter(_TermCounter):
+    """
+    Exact counts of every word or n-gram in a stream of text.
+    
+    Text is read a chunk at a time, so memory grows with the number of
+    distinct terms rather than the size of the text.
+    """
+    
+    def __init__(self, n=1):
+        super().__init__(n)
+        self._counts = Counter()
+    
+    def _add_counts(self, counts):
+        self._counts.update(counts)
+
+class SpaceSavingCounter(_TermCounter):
+    """
+    Approximate counts of the most frequent terms in fixed memory.
+    
+    At most capacity terms are tracked (the SpaceSaving algorithm). When a
+    new term arrives and the table is full, the least counted term is
+    replaced and the newcomer inherits its count. Counts are therefore
+    overestimates by at most error(term), and any term occurring more than
+    total / capacity times is guaranteed to be tracked.
+    """
+    
+    def __init__(self, capacity, n=1):
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError("Capacity must be a positive integer")
+        
+        super().__init__(n)
+        self.capacity = capacity
+        self._counts = {}
+        self._errors = {}
+        # Min-heap of (count, term), one entry per tracked term; an entry's
+        # count may be stale but is never above the term's real count
+        self._heap = []
+    
+    def error(self, term):
+        """
+        Get the most a term's count may be overestimated by.
+        
+        Args:
+            term (str): Word or n-gram
+        
+        Returns:
+            int: Maximum overestimate, 0 for exact counts
+        """
+        return self._errors.get(term, 0)
+    
+    def _add_counts(self, counts):
+        tracked = self._counts
+        errors = self._errors
+        heap = self._heap
+        
+        for term, count in counts.items():
+            if term in tracked:
+                tracked[term] += count
+                continue
+            
+            if len(tracked) < self.capacity:
+                tracked[term] = count
+                errors[term] = 0
+                heapq.heappush(heap, (count, term))
+                continue
+            
+            # Find the least counted term, refreshing stale heap entries
+            minimum, evicted = heap[0]
+            while tracked[evicted] != minimum:
+                heapq.heapreplace(heap, (tracked[evicted], evicted))
+                minimum, evicted = heap[0]
+            
+            del tracked[evicted]
+            del errors[evicted]
+            tracked[term] = minimum + count
+            errors[term] = minimum
+            heapq.heapreplace(heap, (minimum + count, term))
+
 def extract_substring(text, start, end):
     """
     Extract a substring using slicing.
     
+    A TextView is sliced by byte offsets and gives a view, without copying.
+    
     Args:
-        text (str): Text to slice
+        text (str or TextView): Text to slice
         start (int): Starting index
         end (int): Ending index
     
     Returns:
-        str: Extracted substring
+        str or TextView: Extracted substring
     """
     if text is None:
         raise ValueError("Text cannot be None")
@@ -118,6 +638,515 @@ def find_all_occurrences(text, substring):
     
     return positions
 
+class PatternSet:
+    """
+    A compiled set of substrings searched together in a single pass.
+
+    The patterns are compiled once into an Aho-Corasick automaton, which can
+    then be reused to search any number of texts. Like find_all_occurrences,
+    overlapping occurrences are all reported.
+    """
+
+    def __init__(self, patterns):
+        """
+        Compile the search automaton.
+
+        Args:
+            patterns (iterable): Substrings to search for
+        """
+        if patterns is None:
+            raise ValueError("Patterns cannot be None")
+
+        # Remove duplicates but keep the caller's order
+        self.patterns = tuple(dict.fromkeys(patterns))
+
+        if not self.patterns:
+            raise ValueError("Patterns cannot be empty")
+
+        for pattern in self.patterns:
+            if pattern is None:
+                raise ValueError("Substring cannot be None")
+            if not pattern:
+                raise ValueError("Substring cannot be empty")
+
+        # Build the trie: one transition dict, output tuple and depth per state
+        goto = [{}]
+        output = [()]
+        depth = [0]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append(())
+                    depth.append(depth[state] + 1)
+                state = next_state
+            output[state] += (index,)
+
+        # Breadth-first pass to add failure links and merge outputs
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fail[next_state] = goto[link].get(char, 0)
+                output[next_state] += output[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+        self._depth = depth
+        self._lengths = tuple(len(pattern) for pattern in self.patterns)
+
+    def iter_matches(self, text):
+        """
+        Yield every occurrence of every pattern in the text.
+
+        Args:
+            text (str): Text to search in
+
+        Yields:
+            tuple: (start_index, pattern) ordered by the end of the match
+        """
+        if text is None:
+            raise ValueError("Text cannot be None")
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        lengths = self._lengths
+        patterns = self.patterns
+        state = 0
+
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                yield (i - lengths[index] + 1, patterns[index])
+
+    def iter_leftmost_longest(self, text):
+        """
+        Yield non-overlapping occurrences, preferring leftmost then longest.
+
+        Scanning left to right, the occurrence that starts first is taken,
+        the longest of those starting there, and the scan resumes after it.
+        An occurrence is yielded as soon as no longer or earlier one can
+        still complete, which the depth of the automaton's state tells.
+
+        Args:
+            text (str): Text to search in
+
+        Yields:
+            tuple: (start_index, pattern) in order of position
+        """
+        if text is None:
+            raise ValueError("Text cannot be None")
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        depth = self._depth
+        lengths = self._lengths
+        patterns = self.patterns
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        longest = {}  # start -> index of the longest pattern found there
+        starts = []   # heap of the starts in longest
+        resume = 0    # occurrences must start here or later
+        state = 0
+
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            
+            # Occurrences starting before any partial match are final
+            frontier = i + 1 - depth[state]
+            while starts and starts[0] < frontier:
+                start = heappop(starts)
+                index = longest.pop(start)
+                if start >= resume:
+                    yield start, patterns[index]
+                    resume = start + lengths[index]
+            
+            # Matches come longest first and each start once per position;
+            # a later match from the same start is longer
+            for index in output[state]:
+                start = i - lengths[index] + 1
+                if start >= resume:
+                    if start not in longest:
+                        heappush(starts, start)
+                    longest[start] = index
+
+        while starts:
+            start = heappop(starts)
+            index = longest.pop(start)
+            if start >= resume:
+                yield start, patterns[index]
+                resume = start + lengths[index]
+
+    def find_all(self, text):
+        """
+        Find all occurrences of every pattern in the text.
+
+        Args:
+            text (str): Text to search in
+
+        Returns:
+            dict: Pattern mapped to the sorted list of its starting indices
+        """
+        positions = {pattern: [] for pattern in self.patterns}
+        for start, pattern in self.iter_matches(text):
+            positions[pattern].append(start)
+        return positions
+
+def find_all_occurrences_multi(text, patterns):
+    """
+    Find all occurrences of several substrings in one pass over the text.
+
+    Args:
+        text (str): Text to search in
+        patterns: A PatternSet, or an iterable of substrings to compile
+
+    Returns:
+        dict: Pattern mapped to the sorted list of its starting indices
+    """
+    if text is None or patterns is None:
+        raise ValueError("Text and patterns cannot be None")
+
+    if not isinstance(patterns, PatternSet):
+        patterns = PatternSet(patterns)
+
+    return patterns.find_all(text)
+
+class SuffixIndex:
+    """
+    A suffix array over one text for answering many substring queries.
+    
+    The index is built once (prefix doubling on integer ranks) and then every
+    query is a binary search over the sorted suffixes, so it costs
+    O(m log n) for a pattern of length m plus the number of results instead
+    of a scan of the whole text. An index can be saved to disk and loaded
+    again by memory-mapping the file, without rebuilding or reading it all.
+    """
+    
+    def __init__(self, text):
+        """
+        Build the index.
+        
+        Args:
+            text (str): Text to index
+        """
+        if text is None:
+            raise ValueError("Text cannot be None")
+        
+        self._text = text
+        self._offset = 0
+        self._width = 1
+        self._length = len(text)
+        self._suffixes = _build_suffix_array(text)
+        self._mmap = None
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Open an index saved with save() by memory-mapping it.
+        
+        Args:
+            path (str): Index file
+        
+        Returns:
+            SuffixIndex: The loaded index; call close() when done with it
+        """
+        if path is None:
+            raise ValueError("Path cannot be None")
+        
+        if sys.byteorder != 'little':
+            raise ValueError("Saved indexes can only be loaded on little-endian machines")
+        
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _INDEX_HEADER.size:
+                raise ValueError(f"Not a suffix index file: {path}")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        if mapped[:len(_INDEX_MAGIC)] != _INDEX_MAGIC:
+            mapped.close()
+            raise ValueError(f"Not a suffix index file: {path}")
+        
+        # A truncated or corrupted file must not reach memoryview.cast()
+        _, length = _INDEX_HEADER.unpack_from(mapped)
+        suffix_offset = _INDEX_HEADER.size + _align8(4 * length)
+        if (mapped.size() - suffix_offset) % 8 or (mapped.size() - suffix_offset) // 8 != length:
+            mapped.close()
+            raise ValueError(f"Corrupted suffix index file: {path}")
+        
+        index = cls.__new__(cls)
+        index._mmap = mapped
+        index._text = mapped
+        index._offset = _INDEX_HEADER.size
+        index._width = 4
+        index._length = length
+        index._suffixes = memoryview(mapped)[suffix_offset:suffix_offset + 8 * length].cast('q')
+        return index
+    
+    def save(self, path):
+        """
+        Write the index to a file that load() can memory-map.
+        
+        The file holds a header, the text as UTF-32-BE (whose byte order sorts
+        like the code points) and the suffix array as 64-bit integers.
+        
+        Args:
+            path (str): File to write
+        """
+        if path is None:
+            raise ValueError("Path cannot be None")
+        
+        suffixes = array('q', self._suffixes)
+        if sys.byteorder != 'little':
+            suffixes.byteswap()
+        
+        encoded = self._encoded_text()
+        with open(path, 'wb') as f:
+            f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, self._length))
+            f.write(encoded)
+            f.write(b'\0' * (_align8(len(encoded)) - len(encoded)))
+            suffixes.tofile(f)
+    
+    def close(self):
+        """Release the memory map of a loaded index."""
+        if self._mmap is not None:
+            self._suffixes.release()
+            self._mmap.close()
+            self._mmap = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __len__(self):
+        return self._length
+    
+    @property
+    def text(self):
+        """str: The indexed text."""
+        if self._width == 1:
+            return self._text
+        return self._encoded_text().decode('utf-32-be')
+    
+    def find_all(self, substring):
+        """
+        Find all occurrences of a substring in the indexed text.
+        
+        Args:
+            substring (str): Substring to find
+        
+        Returns:
+            list: Sorted starting indices, as find_all_occurrences returns them
+        """
+        low, high = self._match_range(substring)
+        return sorted(self._suffixes[low:high])
+    
+    def count(self, substring):
+        """
+        Count the occurrences of a substring, overlapping ones included.
+        
+        Args:
+            substring (str): Substring to count
+        
+        Returns:
+            int: Number of occurrences
+        """
+        low, high = self._match_range(substring)
+        return high - low
+    
+    def replace(self, old, new):
+        """
+        Replace all occurrences of a substring, like replace_substring.
+        
+        Args:
+            old (str): Substring to replace
+            new (str): Replacement string
+        
+        Returns:
+            str: Text with replacements
+        """
+        if new is None:
+            raise ValueError("Text, old, and new values cannot be None")
+        
+        text = self.text
+        parts = []
+        last = 0
+        for pos in self.find_all(old):
+            # Matches overlapping an earlier replacement are skipped
+            if pos >= last:
+                parts.append(text[last:pos])
+                parts.append(new)
+                last = pos + len(old)
+        parts.append(text[last:])
+        return ''.join(parts)
+    
+    def _encoded_text(self):
+        if self._width == 1:
+            return self._text.encode('utf-32-be')
+        return self._text[self._offset:self._offset + 4 * self._length]
+    
+    def _match_range(self, substring):
+        """
+        Binary search the suffix array for the suffixes starting with substring.
+        
+        Returns:
+            tuple: (low, high) slice of the suffix array holding the matches
+        """
+        if substring is None:
+            raise ValueError("Text and substring cannot be None")
+        
+        if not substring:
+            raise ValueError("Substring cannot be empty")
+        
+        key = substring if self._width == 1 else substring.encode('utf-32-be')
+        text = self._text
+        suffixes = self._suffixes
+        offset = self._offset
+        span = len(key)
+        width = self._width
+        # A loaded index has more data after the text, so slices are clamped
+        text_end = offset + width * self._length
+        
+        # First suffix whose prefix is >= key
+        low, high = 0, self._length
+        while low < high:
+            mid = (low + high) // 2
+            start = offset + width * suffixes[mid]
+            if text[start:min(start + span, text_end)] < key:
+                low = mid + 1
+            else:
+                high = mid
+        first = low
+        
+        # First suffix whose prefix is > key
+        high = self._length
+        while low < high:
+            mid = (low + high) // 2
+            start = offset + width * suffixes[mid]
+            if text[start:min(start + span, text_end)] <= key:
+                low = mid + 1
+            else:
+                high = mid
+        return first, low
+
+def _rank_suffix_groups(suffixes, rank, start, packed, scale, pending):
+    """
+    Store one sorted group of suffixes and rank its subgroups.
+    
+    Args:
+        suffixes (array): Suffix array being built
+        rank (array): Rank of every suffix, the start of its group
+        start (int): Position of the group in the suffix array
+        packed (list): Sorted ``key * scale + suffix`` values of the group
+        scale (int): Multiplier separating the key from the suffix
+        pending (list): Receives the (start, end) of subgroups still tied
+    """
+    members = [value % scale for value in packed]
+    end = start + len(members)
+    suffixes[start:end] = array('q', members)
+    head = start
+    previous = -1
+    for position, value in enumerate(packed, start):
+        key = value // scale
+        if key != previous:
+            if position - head > 1:
+                pending.append((head, position))
+            head = position
+            previous = key
+        rank[members[position - start]] = head
+    if end - head > 1:
+        pending.append((head, end))
+
+def _build_suffix_array(text):
+    """
+    Sort the suffixes of a text with integer ranks.
+    
+    A counting pass over the code points places every suffix in the bucket
+    of its first character, each bucket is sorted on the next few characters
+    packed into one integer, and prefix doubling then re-sorts only the
+    groups that are still tied. Suffixes and ranks live in ``array('q')``,
+    so the index holds 16 bytes per character and the build peaks at about
+    40; CPython sorts roughly a million characters in 3-6 seconds, which
+    makes texts of a few tens of megabytes the practical limit. Build larger
+    indexes once and reuse them with save() and load().
+    
+    Args:
+        text (str): Text to index
+    
+    Returns:
+        array: Starting positions of the suffixes in sorted order
+    """
+    n = len(text)
+    if n == 0:
+        return array('q')
+    
+    suffixes = array('q', bytes(8 * n))
+    rank = array('q', bytes(8 * n))
+    buckets = []
+    fill = {}
+    total = 0
+    for character, count in sorted(Counter(text).items()):
+        fill[character] = total
+        buckets.append((total, total + count))
+        total += count
+    for i, character in enumerate(text):
+        position = fill[character]
+        suffixes[position] = i
+        fill[character] = position + 1
+    
+    # Code points as UTF-32-BE with the always-zero top byte set, so the zero
+    # padding past the end sorts before every real character
+    data = bytearray(text.encode('utf-32-be'))
+    data[0::4] = b'\x01' * n
+    data += bytes(4 * _SUFFIX_PREFIX_LENGTH)
+    width = 4 * (_SUFFIX_PREFIX_LENGTH - 1)
+    scale = n + 1
+    groups = []
+    for start, end in buckets:
+        if end - start == 1:
+            rank[suffixes[start]] = start
+            continue
+        packed = sorted([int.from_bytes(data[4 * i + 4:4 * i + 4 + width], 'big') * scale + i
+                         for i in suffixes[start:end]])
+        _rank_suffix_groups(suffixes, rank, start, packed, scale, groups)
+    del data
+    
+    # Ranks are updated in place; a rank that is already finer than this
+    # round still orders the group correctly. The one suffix that ends
+    # exactly `step` further on sorts first in its group
+    step = _SUFFIX_PREFIX_LENGTH
+    while groups:
+        pending = []
+        limit = n - step
+        for start, end in groups:
+            packed = sorted([(rank[i + step] + 1) * scale + i if i < limit else i
+                             for i in suffixes[start:end]])
+            _rank_suffix_groups(suffixes, rank, start, packed, scale, pending)
+        groups = pending
+        step *= 2
+    
+    return suffixes
+
+def _align8(size):
+    """Round a byte count up to a multiple of 8."""
+    return (size + 7) & ~7
+
 def replace_substring(text, old, new):
     """
     Replace all occurrences of a substring.
@@ -138,39 +1167,133 @@ def replace_substring(text, old, new):
     
     return text.replace(old, new)
 
+def replace_substrings(text, replacements):
+    """
+    Apply many replacements in a single scan of the text.
+    
+    The old substrings are compiled into a PatternSet. Where several could
+    match, the leftmost match wins, and of the matches starting there the
+    longest wins. Replaced text is never scanned again, so the result does
+    not depend on the mapping's order.
+    
+    Args:
+        text (str): Text to modify
+        replacements (dict): Mapping of old substrings to replacement strings
+    
+    Returns:
+        str: Text with replacements
+    """
+    if text is None or replacements is None:
+        raise ValueError("Text and replacements cannot be None")
+    
+    for old, new in replacements.items():
+        if old is None or new is None:
+            raise ValueError("Text, old, and new values cannot be None")
+        if not old:
+            raise ValueError("Old substring cannot be empty")
+    
+    if not replacements:
+        return text
+    
+    parts = []
+    position = 0
+    for start, old in PatternSet(replacements).iter_leftmost_longest(text):
+        parts.append(text[position:start])
+        parts.append(replacements[old])
+        position = start + len(old)
+    parts.append(text[position:])
+    return ''.join(parts)
+
 def split_text(text, delimiter=None):
     """
     Split text using a delimiter.
     
     Args:
-        text (str): Text to split
+        text (str or TextView): Text to split
         delimiter (str, optional): Delimiter to use. Defaults to None (whitespace).
     
     Returns:
-        list: List of text parts
+        list: List of text parts, TextViews if text is one
     """
     if text is None:
         raise ValueError("Text cannot be None")
     
     return text.split(delimiter)
 
-def join_text(parts, delimiter=""):
+def iter_split(source, delimiter=None, chunk_size=DEFAULT_CHUNK_SIZE):
     """
-    Join text parts using a delimiter.
+    Split text lazily, with the same results as split_text.
+    
+    Parts are yielded as soon as they are complete, so only the current part
+    and one chunk are held in memory. Bytes, mmap and memoryview sources are
+    split in place and give TextViews.
     
     Args:
-        parts (list): Text parts to join
-        delimiter (str, optional): Delimiter to use. Defaults to "".
+        source: A string, TextView, buffer, file object or iterable of text chunks
+        delimiter (str, optional): Delimiter to use. Defaults to None (whitespace).
+        chunk_size (int, optional): Buffer size used when reading files
     
-    Returns:
-        str: Joined text
+    Yields:
+        str or TextView: Successive parts
     """
-    if parts is None:
-        raise ValueError("Parts list cannot be None")
+    if source is None:
+        raise ValueError("Source cannot be None")
     
-    return delimiter.join(parts)
-
-def to_uppercase(text):
+    if delimiter is not None and not delimiter:
+        raise ValueError("empty separator")
+    
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        source = TextView(source)
+    if isinstance(source, TextView):
+        yield from source.iter_split(delimiter)
+        return
+    
+    # Chunks that cannot end the current part are collected and joined once
+    pending = []
+    overlap = 0 if delimiter is None else len(delimiter) - 1
+    tail = ''
+    
+    for chunk in _iter_text_chunks(source, chunk_size):
+        if delimiter is None:
+            complete = len(chunk.split(None, 1)) != 1 or chunk[0].isspace() or chunk[-1].isspace()
+        else:
+            # The delimiter may straddle the previous chunk and this one
+            complete = delimiter in tail + chunk
+            if overlap:
+                tail = (tail + chunk)[-overlap:]
+        
+        pending.append(chunk)
+        if not complete:
+            continue
+        
+        text = ''.join(pending)
+        parts = text.split(delimiter)
+        if delimiter is not None or not text[-1].isspace():
+            pending = [parts.pop()]
+        else:
+            pending = []
+        yield from parts
+    
+    if delimiter is not None or pending:
+        yield ''.join(pending)
+
+def join_text(parts, delimiter=""):
+    """
+    Join text parts using a delimiter.
+    
+    Args:
+        parts (list): Text parts to join
+        delimiter (str, optional): Delimiter to use. Defaults to "".
+    
+    Returns:
+        str: Joined text
+    """
+    if parts is None:
+        raise ValueError("Parts list cannot be None")
+    
+    return delimiter.join(parts)
+
+def to_uppercase(text):
     """
     Convert text to uppercase.
     
@@ -215,6 +1338,120 @@ def capitalize_text(text):
     
     return text.title()
 
+def to_uppercase_stream(source, sink, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Convert a file or chunk iterator to uppercase, writing to a sink.
+    
+    Args:
+        source: File object or iterable of text chunks to convert
+        sink: File object opened for writing text
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Returns:
+        int: Number of characters written
+    """
+    return _convert_stream(source, sink, str.upper, chunk_size)
+
+def to_lowercase_stream(source, sink, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Convert a file or chunk iterator to lowercase, writing to a sink.
+    
+    Args:
+        source: File object or iterable of text chunks to convert
+        sink: File object opened for writing text
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Returns:
+        int: Number of characters written
+    """
+    return _convert_stream(source, sink, str.lower, chunk_size)
+
+def capitalize_text_stream(source, sink, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Capitalize each word of a file or chunk iterator, writing to a sink.
+    
+    The output is the same as capitalize_text on the whole text, including
+    for words split between two chunks.
+    
+    Args:
+        source: File object or iterable of text chunks to capitalize
+        sink: File object opened for writing text
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Returns:
+        int: Number of characters written
+    """
+    return _convert_stream(source, sink, str.title, chunk_size)
+
+def _convert_stream(source, sink, convert, chunk_size):
+    """
+    Apply a str case conversion to a stream a segment at a time.
+    
+    title() and the final sigma rule of lower() depend on the neighbouring
+    characters, so text is normally cut just after whitespace and the
+    partial word is carried into the next chunk. A word longer than a chunk
+    is cut between two letters or digits instead, and each side is converted
+    with an 'a' (cased) or ' ' (not cased) standing in for the character on
+    the other side.
+    
+    Args:
+        source: File object or iterable of text chunks
+        sink: File object opened for writing text
+        convert (callable): str.upper, str.lower or str.title
+        chunk_size (int): Buffer size used when reading files
+    
+    Returns:
+        int: Number of characters written
+    """
+    if sink is None:
+        raise ValueError("Sink cannot be None")
+    
+    written = 0
+    carry = ''
+    prefix = ''
+    
+    for chunk in _iter_text_chunks(source, chunk_size):
+        text = carry + chunk
+        cut = len(text) - len(text.rsplit(None, 1)[-1]) if not text[-1].isspace() else len(text)
+        suffix = ''
+        
+        if cut == 0:
+            if len(text) <= chunk_size:
+                carry = text
+                continue
+            
+            # No whitespace to cut at; look back a little for two letters or
+            # digits, which case conversion never looks past
+            cut = len(text) - 1
+            for position in range(len(text) - 1, max(len(text) - 256, 0), -1):
+                if _is_case_anchor(text[position - 1]) and _is_case_anchor(text[position]):
+                    cut = position
+                    break
+            suffix = 'a' if _is_cased(text[cut]) else ' '
+        
+        converted = convert(prefix + text[:cut] + suffix)
+        converted = converted[len(prefix):len(converted) - len(suffix)]
+        sink.write(converted)
+        written += len(converted)
+        carry = text[cut:]
+        prefix = suffix and ('a' if _is_cased(text[cut - 1]) else ' ')
+    
+    if carry:
+        converted = convert(prefix + carry)[len(prefix):]
+        sink.write(converted)
+        written += len(converted)
+    
+    return written
+
+def _is_cased(character):
+    """Check whether a character has case, as title() decides it."""
+    return character.islower() or character.isupper() or character.istitle()
+
+def _is_case_anchor(character):
+    """Check whether a character stops the context scan of lower() and title()."""
+    # Modifier letters are alphanumeric but skipped over like apostrophes
+    return character.isalnum() and unicodedata.category(character) != 'Lm'
+
 def strip_whitespace(text):
     """
     Remove leading and trailing whitespace.
@@ -244,11 +1481,213 @@ def format_text_with_variables(template, **variables):
     if template is None:
         raise ValueError("Template cannot be None")
     
+    compiled = compile_template(template)
+    compiled._check_variables(variables)
+    return compiled._render_function(variables)
+
+class CompiledTemplate:
+    """
+    A format template parsed once and rendered many times.
+    
+    The template is parsed into literal text and (field, conversion, spec)
+    entries when it is compiled, and those are turned into a single
+    expression that joins the literals with format(value, spec). Rendering
+    evaluates that expression, so str.format's parsing is not repeated per
+    call. The required variables are checked before any value is formatted.
+    Templates with positional fields such as "{}" or "{0}" are left to
+    str.format, which rejects them with IndexError as before.
+    """
+    
+    def __init__(self, template):
+        """
+        Parse the template.
+        
+        Args:
+            template (str): Template text with placeholders
+        """
+        if template is None:
+            raise ValueError("Template cannot be None")
+        
+        self.template = template
+        self.required = frozenset(_template_fields(template))
+        self._segments = _parse_template(template)
+        if self._segments is None:
+            self._render_function = functools.partial(_format_variables, template)
+        else:
+            namespace = {}
+            exec(_TEMPLATE_FUNCTION.format(expression=_template_expression(self._segments)), namespace)
+            self._render_function = namespace['render']
+    
+    def render(self, **variables):
+        """
+        Render the template.
+        
+        Args:
+            **variables: Variable keyword arguments to substitute
+        
+        Returns:
+            str: Formatted text
+        """
+        self._check_variables(variables)
+        return self._render_function(variables)
+    
+    def render_many(self, variable_sets):
+        """
+        Render the template once for each set of variables.
+        
+        Args:
+            variable_sets (iterable): Dicts of variables to substitute
+        
+        Yields:
+            str: Formatted text for each dict
+        """
+        if variable_sets is None:
+            raise ValueError("Variable sets cannot be None")
+        
+        required = self.required
+        render_function = self._render_function
+        for variables in variable_sets:
+            if not variables.keys() >= required:
+                self._check_variables(variables)
+            yield render_function(variables)
+    
+    def _check_variables(self, variables):
+        """
+        Reject a set of variables that lacks a required name.
+        
+        Args:
+            variables (dict): Variables to substitute
+        """
+        missing = self.required - variables.keys()
+        if missing:
+            raise ValueError(f"Missing required variable: {min(missing)!r}")
+
+def _format_variables(template, variables):
+    """Render a template that only str.format can handle."""
     try:
         return template.format(**variables)
     except KeyError as e:
         raise ValueError(f"Missing required variable: {e}")
 
+def _parse_template(template):
+    """
+    Split a format template into literal text and fields.
+    
+    Args:
+        template (str): Template text with placeholders
+    
+    Returns:
+        list: (literal, name, steps, conversion, spec) tuples, where steps
+            are (is_attribute, key) lookups after the name and spec is a
+            string or, for nested fields, another list of segments; None
+            for templates that only str.format can handle
+    """
+    segments = []
+    for literal, field_name, format_spec, conversion in _FORMATTER.parse(template):
+        if field_name is None:
+            segments.append((literal, None, (), None, ''))
+            continue
+        
+        name = _FIELD_NAME_PATTERN.match(field_name).group()
+        if not name or name.isdigit():
+            return None
+        
+        steps = []
+        position = len(name)
+        for match in _FIELD_STEP_PATTERN.finditer(field_name, position):
+            if match.start() != position:
+                break
+            attribute, key = match.groups()
+            if attribute is not None:
+                steps.append((True, attribute))
+            else:
+                steps.append((False, int(key) if key.isdigit() else key))
+            position = match.end()
+        if position != len(field_name):
+            return None
+        
+        if conversion is not None and conversion not in 'rsa':
+            raise ValueError(f"Unknown conversion specifier {conversion}")
+        
+        if '{' in format_spec:
+            format_spec = _parse_template(format_spec)
+            if format_spec is None:
+                return None
+        segments.append((literal, name, tuple(steps), conversion, format_spec))
+    return segments
+
+def _template_expression(segments):
+    """
+    Build the Python expression that renders parsed template segments.
+    
+    Every literal, name and key is embedded with repr(), so the expression
+    only ever reads from the variables mapping.
+    
+    Args:
+        segments (list): Segments from _parse_template
+    
+    Returns:
+        str: Expression in terms of "variables"
+    """
+    parts = []
+    for literal, name, steps, conversion, spec in segments:
+        if literal:
+            parts.append(repr(literal))
+        if name is None:
+            continue
+        
+        value = f'variables[{name!r}]'
+        for is_attribute, key in steps:
+            value = f'getattr({value}, {key!r})' if is_attribute else f'{value}[{key!r}]'
+        if conversion is not None:
+            value = f'{_TEMPLATE_CONVERSIONS[conversion]}({value})'
+        spec = repr(spec) if isinstance(spec, str) else _template_expression(spec)
+        parts.append(f'format({value}, {spec})')
+    
+    if not parts:
+        return "''"
+    if len(parts) == 1:
+        return parts[0]
+    return "''.join((" + ', '.join(parts) + '))'
+
+def _template_fields(template):
+    """
+    Collect the variable names used by a format template.
+    
+    Args:
+        template (str): Template text with placeholders
+    
+    Returns:
+        set: Names of the variables the template needs
+    """
+    names = set()
+    for _, field_name, format_spec, _ in _FORMATTER.parse(template):
+        if field_name is None:
+            continue
+        
+        # "{user.name}" and "{user[0]}" both need the variable "user"
+        name = _FIELD_NAME_PATTERN.match(field_name).group()
+        if name and not name.isdigit():
+            names.add(name)
+        
+        # Nested fields such as "{value:{width}}"
+        if format_spec:
+            names |= _template_fields(format_spec)
+    return names
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(template):
+    """
+    Get the compiled form of a template, reusing recently compiled ones.
+    
+    Args:
+        template (str): Template text with placeholders
+    
+    Returns:
+        CompiledTemplate: The parsed template
+    """
+    return CompiledTemplate(template)
+
 def is_palindrome(text):
     """
     Check if text is a palindrome (reads the same forward and backward).
@@ -266,163 +1705,2019 @@ def is_palindrome(text):
     if not text:
         return True
     
-    # Remove non-alphanumeric characters and convert to lowercase
-    cleaned = ''.join(c.lower() for c in text if c.isalnum())
+    # Remove non-alphanumeric characters and convert to lowercase
+    cleaned = ''.join(c.lower() for c in text if c.isalnum())
+    
+    # If there are no alphanumeric characters, it's not a palindrome
+    if not cleaned:
+        return False
+    
+    return cleaned == cleaned[::-1]
+
+def is_palindrome_two_pointer(text, block_size=PALINDROME_BLOCK_SIZE):
+    """
+    Check if text is a palindrome without building a cleaned copy of it.
+    
+    The text is walked from both ends at once, a block at a time, and only
+    one block's worth of cleaned characters is held from each end. Gives the
+    same answers as is_palindrome.
+    
+    Args:
+        text (str): Text to check
+        block_size (int, optional): Characters examined per step at each end
+    
+    Returns:
+        bool: True if palindrome, False otherwise
+    """
+    if text is None:
+        raise ValueError("Text cannot be None")
+    
+    if not isinstance(block_size, int) or block_size <= 0:
+        raise ValueError("Block size must be a positive integer")
+    
+    # Empty string is considered a palindrome
+    if not text:
+        return True
+    
+    return _is_palindrome_from_both_ends(len(text), lambda start, end: text[start:end],
+                                         lambda position, step: position, block_size)
+
+def is_palindrome_file(path, block_size=PALINDROME_BLOCK_SIZE):
+    """
+    Check if a UTF-8 text file is a palindrome in constant memory.
+    
+    The file is memory-mapped and walked from both ends, so files of any
+    size can be checked. Gives the same answer as is_palindrome on the
+    file's text.
+    
+    Args:
+        path (str): File to check
+        block_size (int, optional): Bytes examined per step at each end
+    
+    Returns:
+        bool: True if palindrome, False otherwise
+    """
+    if path is None:
+        raise ValueError("Path cannot be None")
+    
+    if not isinstance(block_size, int) or block_size <= 0:
+        raise ValueError("Block size must be a positive integer")
+    
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        # Empty file is considered a palindrome (and cannot be mapped)
+        if size == 0:
+            return True
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            def align(position, step):
+                # Step over UTF-8 continuation bytes to a character start
+                while 0 < position < size and 0x80 <= mapped[position] < 0xC0:
+                    position += step
+                return position
+            
+            return _is_palindrome_from_both_ends(size, lambda start, end: str(mapped[start:end], 'utf-8'),
+                                                 align, block_size)
+
+def _is_palindrome_from_both_ends(length, read, align, block_size):
+    """
+    Compare the cleaned characters read from the front and back of a text.
+    
+    Args:
+        length (int): Length of the text in the units read() takes
+        read (callable): read(start, end) returns that part of the text as str
+        align (callable): align(position, step) moves a position by step
+            (1 or -1) until it is on a character boundary
+        block_size (int): Units read per step
+    
+    Returns:
+        bool: True if the alphanumeric characters read the same both ways
+    """
+    front = 0
+    back = length
+    pending_front = ''  # Cleaned characters from the front not yet compared
+    pending_back = ''   # Cleaned characters from the back, reversed
+    found = False
+    
+    while back - front > 2 * block_size:
+        if len(pending_front) <= len(pending_back):
+            end = align(front + block_size, 1)
+            cleaned = _clean_for_palindrome(read(front, end))
+            pending_front += cleaned
+            front = end
+        else:
+            start = align(back - block_size, -1)
+            cleaned = _clean_for_palindrome(read(start, back))
+            pending_back += cleaned[::-1]
+            back = start
+        found = found or bool(cleaned)
+        
+        matched = min(len(pending_front), len(pending_back))
+        if pending_front[:matched] != pending_back[:matched]:
+            return False
+        pending_front = pending_front[matched:]
+        pending_back = pending_back[matched:]
+    
+    # Whatever is left fits in a few blocks and is checked directly
+    rest = pending_front + _clean_for_palindrome(read(front, back)) + pending_back[::-1]
+    
+    # If there are no alphanumeric characters, it's not a palindrome
+    if not found and not rest:
+        return False
+    
+    return rest == rest[::-1]
+
+def _clean_for_palindrome(text):
+    """Keep the alphanumeric characters of text, lowercased one by one."""
+    if text.isascii():
+        return text.encode('ascii').translate(_ASCII_LOWER, _ASCII_NON_ALNUM).decode('ascii')
+    return ''.join(c.lower() for c in text if c.isalnum())
+
+def count_vowels_and_consonants(text):
+    """
+    Count vowels and consonants in text.
+    
+    Args:
+        text (str): Text to analyze
+    
+    Returns:
+        tuple: (vowel_count, consonant_count)
+    """
+    if text is None:
+        raise ValueError("Text cannot be None")
+    
+    if isinstance(text, TextView):
+        return text._count_vowels_and_consonants()
+    
+    # ASCII text is counted in bulk on bytes, a slice at a time
+    if text.isascii():
+        vowel_count = 0
+        letter_count = 0
+        for start in range(0, len(text), DEFAULT_CHUNK_SIZE):
+            letters = text[start:start + DEFAULT_CHUNK_SIZE].encode('ascii').translate(_ASCII_LOWER, _ASCII_NON_LETTERS)
+            letter_count += len(letters)
+            vowel_count += (letters.count(b'a') + letters.count(b'e') + letters.count(b'i')
+                            + letters.count(b'o') + letters.count(b'u'))
+        return (vowel_count, letter_count - vowel_count)
+    
+    text = text.lower()
+    vowels = 'aeiou'
+    vowel_count = 0
+    consonant_count = 0
+    
+    for char in text:
+        if char.isalpha():
+            if char in vowels:
+                vowel_count += 1
+            else:
+                consonant_count += 1
+    
+    return (vowel_count, consonant_count)
+
+class TextDocument:
+    """
+    An editable text whose statistics are kept up to date after each edit.
+    
+    The text is held as a list of chunks of about DOCUMENT_CHUNK_SIZE
+    characters. An edit rebuilds only the chunks it touches, and the counts
+    are updated from the removed and inserted text plus one character on
+    either side, so its cost depends on the size of the edit rather than of
+    the document. Finding a position is a binary search over the
+    chunk start offsets, which are recomputed lazily after the edited chunk.
+    """
+    
+    def __init__(self, text=""):
+        """
+        Create a document.
+        
+        Args:
+            text (str, optional): Initial text. Defaults to "".
+        """
+        if text is None:
+            raise ValueError("Text cannot be None")
+        
+        self._chunks = [text[i:i + DOCUMENT_CHUNK_SIZE] for i in range(0, len(text), DOCUMENT_CHUNK_SIZE)] or ['']
+        self._starts = [0]  # Start offsets of the first _valid chunks
+        self._valid = 1
+        self._length = len(text)
+        self._words = count_words(text)
+        self._vowels, self._consonants = count_vowels_and_consonants(text)
+        self._newlines = text.count('\n')
+    
+    def __len__(self):
+        return self._length
+    
+    def __str__(self):
+        return self.text
+    
+    @property
+    def text(self):
+        """str: The current text, joined from the chunks on each access."""
+        return ''.join(self._chunks)
+    
+    @property
+    def char_count(self):
+        """int: Number of characters, as count_characters returns."""
+        return self._length
+    
+    @property
+    def word_count(self):
+        """int: Number of words, as count_words returns."""
+        return self._words
+    
+    @property
+    def vowel_count(self):
+        """int: Number of vowels, as count_vowels_and_consonants returns."""
+        return self._vowels
+    
+    @property
+    def consonant_count(self):
+        """int: Number of consonants, as count_vowels_and_consonants returns."""
+        return self._consonants
+    
+    @property
+    def line_count(self):
+        """int: Number of lines; a final line without a newline counts too."""
+        if self._length and not self._chunks[-1].endswith('\n'):
+            return self._newlines + 1
+        return self._newlines
+    
+    def stats(self):
+        """
+        Get all statistics at once.
+        
+        Returns:
+            dict: Keys "characters", "words", "vowels", "consonants" and "lines"
+        """
+        return {
+            "characters": self._length,
+            "words": self._words,
+            "vowels": self._vowels,
+            "consonants": self._consonants,
+            "lines": self.line_count,
+        }
+    
+    def get_text(self, start, end):
+        """
+        Get part of the text without joining the whole document.
+        
+        Args:
+            start (int): Starting index
+            end (int): Ending index
+        
+        Returns:
+            str: The text between start and end
+        """
+        self._check_range(start, end)
+        return self._slice(start, end)
+    
+    def append(self, text):
+        """
+        Add text at the end of the document.
+        
+        Args:
+            text (str): Text to add
+        """
+        self.replace(self._length, self._length, text)
+    
+    def insert(self, position, text):
+        """
+        Insert text before the given position.
+        
+        Args:
+            position (int): Index to insert at, from 0 to len(document)
+            text (str): Text to insert
+        """
+        self.replace(position, position, text)
+    
+    def delete(self, start, end):
+        """
+        Delete the text between start and end.
+        
+        Args:
+            start (int): Starting index
+            end (int): Ending index
+        """
+        self.replace(start, end, "")
+    
+    def replace(self, start, end, text):
+        """
+        Replace the text between start and end with new text.
+        
+        Args:
+            start (int): Starting index
+            end (int): Ending index
+            text (str): Replacement text
+        """
+        if text is None:
+            raise ValueError("Text cannot be None")
+        
+        self._check_range(start, end)
+        
+        # A word starts wherever a non-space follows a space, so only word
+        # starts inside the edit and just after it can change; one character
+        # on each side is enough context to count them
+        before = self._slice(max(start - 1, 0), start)
+        removed = self._slice(start, end)
+        after = self._slice(end, min(end + 1, self._length))
+        self._words += count_words(before + text + after) - count_words(before + removed + after)
+        
+        # Letters and newlines are counted per character, so only the
+        # removed and inserted text matter
+        removed_vowels, removed_consonants = count_vowels_and_consonants(removed)
+        added_vowels, added_consonants = count_vowels_and_consonants(text)
+        self._vowels += added_vowels - removed_vowels
+        self._consonants += added_consonants - removed_consonants
+        self._newlines += text.count('\n') - removed.count('\n')
+        
+        # Rebuild the chunks holding start and end, merging a small result
+        # into the next chunk and splitting a large one
+        first, first_offset = self._locate(start)
+        last, last_offset = self._locate(end)
+        merged = self._chunks[first][:first_offset] + text + self._chunks[last][last_offset:]
+        last += 1
+        if len(merged) < DOCUMENT_CHUNK_SIZE // 2 and last < len(self._chunks):
+            merged += self._chunks[last]
+            last += 1
+        pieces = [merged[i:i + DOCUMENT_CHUNK_SIZE] for i in range(0, len(merged), DOCUMENT_CHUNK_SIZE)]
+        if not pieces and len(self._chunks) - (last - first) == 0:
+            pieces = ['']
+        self._chunks[first:last] = pieces
+        
+        # Chunks before the edit keep their start offsets
+        self._length += len(text) - (end - start)
+        self._valid = min(self._valid, first + 1, len(self._chunks))
+        del self._starts[self._valid:]
+    
+    def _check_range(self, start, end):
+        """Validate start and end as indexes of the document."""
+        if not isinstance(start, int) or not isinstance(end, int):
+            raise ValueError("Start and end must be integers")
+        
+        if start < 0 or start > self._length:
+            raise ValueError(f"Start index {start} out of range")
+        
+        if end < 0 or end > self._length:
+            raise ValueError(f"End index {end} out of range")
+        
+        if start > end:
+            raise ValueError("Start index must be less than or equal to end index")
+    
+    def _locate(self, position):
+        """
+        Find the chunk holding a position.
+        
+        Args:
+            position (int): Index from 0 to len(document)
+        
+        Returns:
+            tuple: (chunk index, offset in that chunk); the end of the
+                document is the end of the last chunk
+        """
+        chunks = self._chunks
+        starts = self._starts
+        if self._valid < len(chunks) and position >= starts[-1] + len(chunks[self._valid - 1]):
+            # Compute the missing start offsets, up to the last chunk
+            starts.extend(islice(accumulate(map(len, chunks[self._valid - 1:-1]), initial=starts[-1]), 1, None))
+            self._valid = len(chunks)
+        
+        index = bisect.bisect_right(starts, position) - 1
+        return index, position - starts[index]
+    
+    def _slice(self, start, end):
+        """Join the text between start and end from the chunks it spans."""
+        if start >= end:
+            return ''
+        index, offset = self._locate(start)
+        parts = []
+        remaining = end - start
+        while remaining > 0:
+            part = self._chunks[index][offset:offset + remaining]
+            parts.append(part)
+            remaining -= len(part)
+            index += 1
+            offset = 0
+        return ''.join(parts)
+
+def extract_email_addresses(text):
+    """
+    Extract email addresses from text using string methods.
+    
+    Args:
+        text (str): Text to analyze
+    
+    Returns:
+        list: List of extracted email addresses
+    """
+    if text is None:
+        raise ValueError("Text cannot be None")
+    
+    words = text.split()
+    emails = []
+    
+    for word in words:
+        # Simple email extraction logic using string methods
+        clean_word = word.strip(_TOKEN_PUNCTUATION)
+        
+        if _is_email_address(clean_word):
+            emails.append(clean_word)
+    
+    return emails
+
+def _is_email_address(word):
+    """
+    Check whether a cleaned word looks like an email address.
+    
+    Args:
+        word (str): Word with surrounding punctuation removed
+    
+    Returns:
+        bool: True if the word is an email address
+    """
+    # Check for @ symbol with text before and after
+    if '@' in word:
+        parts = word.split('@')
+        if len(parts) == 2 and parts[0] and parts[1] and '.' in parts[1]:
+            # Validate domain has at least one dot
+            domain_parts = parts[1].split('.')
+            if len(domain_parts) >= 2 and all(domain_parts):
+                return True
+    return False
+
+def extract_dates(text):
+    """
+    Extract dates in yyyy-mm-dd format from text.
+    
+    Args:
+        text (str): Text to analyze
+    
+    Returns:
+        list: List of extracted dates
+    """
+    if text is None:
+        raise ValueError("Text cannot be None")
+    
+    words = text.split()
+    dates = []
+    
+    for word in words:
+        # Clean the word
+        clean_word = word.strip(_TOKEN_PUNCTUATION)
+        
+        if _is_date(clean_word):
+            dates.append(clean_word)
+    
+    return dates
+
+def _is_date(word):
+    """
+    Check whether a cleaned word is a date in yyyy-mm-dd format.
+    
+    Args:
+        word (str): Word with surrounding punctuation removed
+    
+    Returns:
+        bool: True if the word is a valid date
+    """
+    # Check if it matches date format yyyy-mm-dd
+    if len(word) == 10 and word[4] == '-' and word[7] == '-':
+        year_part = word[0:4]
+        month_part = word[5:7]
+        day_part = word[8:10]
+        
+        # Check if all parts are digits
+        if (year_part.isdigit() and month_part.isdigit() and day_part.isdigit()):
+            # Basic validation of month and day
+            month = int(month_part)
+            day = int(day_part)
+            
+            if 1 <= month <= 12 and 1 <= day <= 31:
+                return True
+    return False
+
+def iter_email_addresses(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream the email addresses in a file or chunk iterator with their positions.
+    
+    Finds the same addresses as extract_email_addresses, one at a time, so
+    memory use depends only on the chunk size. Addresses split across two
+    chunks are found once. Words longer than MAX_TOKEN_LENGTH characters
+    (or the chunk size, if larger) are skipped.
+    
+    Args:
+        source: String, file object or iterable of text chunks
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Yields:
+        tuple: (email, offset, line) where offset is the character offset of
+            the address in the source and line is its 1-based line number
+    """
+    for word, offset, line in _iter_tokens(source, chunk_size, _EMAIL_CANDIDATE_PATTERN):
+        clean_word = word.strip(_TOKEN_PUNCTUATION)
+        if _is_email_address(clean_word):
+            yield clean_word, offset + len(word) - len(word.lstrip(_TOKEN_PUNCTUATION)), line
+
+def iter_dates(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream the yyyy-mm-dd dates in a file or chunk iterator with their positions.
+    
+    Finds the same dates as extract_dates, one at a time, so memory use
+    depends only on the chunk size. Dates split across two chunks are found
+    once. Words longer than MAX_TOKEN_LENGTH characters (or the chunk size,
+    if larger) are skipped.
+    
+    Args:
+        source: String, file object or iterable of text chunks
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Yields:
+        tuple: (date, offset, line) where offset is the character offset of
+            the date in the source and line is its 1-based line number
+    """
+    for word, offset, line in _iter_tokens(source, chunk_size, _DATE_CANDIDATE_PATTERN):
+        clean_word = word.strip(_TOKEN_PUNCTUATION)
+        if _is_date(clean_word):
+            yield clean_word, offset + len(word) - len(word.lstrip(_TOKEN_PUNCTUATION)), line
+
+def _iter_tokens(source, chunk_size=DEFAULT_CHUNK_SIZE, pattern=_WORD_PATTERN):
+    """
+    Yield whitespace-separated tokens of a source with their positions.
+    
+    Text after the last whitespace of a chunk is carried into the next one,
+    so a token is never split. A token longer than MAX_TOKEN_LENGTH (or
+    chunk_size, if larger) is dropped as soon as that is known, so the
+    carried text stays bounded. Only tokens matched in full by pattern are
+    yielded, which lets callers skip uninteresting tokens at regex speed.
+    
+    Args:
+        source: String, file object or iterable of text chunks
+        chunk_size (int, optional): Buffer size used when reading files
+        pattern (re.Pattern, optional): Pattern matching whole tokens
+    
+    Yields:
+        tuple: (token, offset, line) with the character offset and the
+            1-based line number of the token
+    """
+    carry = ''
+    offset = 0  # Offset of the start of carry in the source
+    line = 1    # Line number at the start of carry
+    skipping = False  # Inside a token that was too long to keep
+    limit = max(MAX_TOKEN_LENGTH, chunk_size)
+    chunks = _iter_text_chunks(source, chunk_size)
+    
+    while True:
+        chunk = next(chunks, None)
+        if chunk is None:
+            block, carry = carry, ''
+        else:
+            if carry and len(carry) + len(chunk) > limit:
+                match = _WHITESPACE_PATTERN.search(chunk)
+                if len(carry) + (len(chunk) if match is None else match.start()) > limit:
+                    offset += len(carry)
+                    carry = ''
+                    skipping = True
+            
+            if skipping:
+                # Dropped text has no whitespace, so no line breaks either
+                match = _WHITESPACE_PATTERN.search(chunk)
+                if match is None:
+                    offset += len(chunk)
+                    continue
+                offset += match.start()
+                chunk = chunk[match.start():]
+                skipping = False
+            
+            match = _THROUGH_LAST_WHITESPACE_PATTERN.match(chunk)
+            if match is None:
+                carry += chunk
+                continue
+            cut = match.end()
+            block, carry = carry + chunk[:cut], chunk[cut:]
+        
+        position = 0
+        for match in pattern.finditer(block):
+            line += block.count('\n', position, match.start())
+            position = match.start()
+            yield match.group(), offset + position, line
+        
+        if chunk is None:
+            return
+        line += block.count('\n', position)
+        offset += len(block)
+
+def analyze_text(text):
+    """
+    Compute the full text report in one pass over the text, a slice at a time.
+    
+    Gives the same results as calling count_characters, count_words,
+    count_vowels_and_consonants, is_palindrome, extract_email_addresses and
+    extract_dates separately. Each slice is split into words once; letters
+    are counted in bulk with count_vowels_and_consonants, only words holding
+    '@' or '-' are checked as emails or dates, and the palindrome check
+    walks in from both ends without building a cleaned copy.
+    
+    Args:
+        text (str): Text to analyze
+    
+    Returns:
+        dict: Keys "characters", "words", "vowels", "consonants",
+            "is_palindrome", "emails" and "dates"
+    """
+    if text is None:
+        raise ValueError("Text cannot be None")
+    
+    word_count = 0
+    vowel_count = 0
+    consonant_count = 0
+    emails = []
+    dates = []
+    carry = ''
+    
+    for start in range(0, len(text), DEFAULT_CHUNK_SIZE):
+        piece = text[start:start + DEFAULT_CHUNK_SIZE]
+        vowels, consonants = count_vowels_and_consonants(piece)
+        vowel_count += vowels
+        consonant_count += consonants
+        
+        # A word cut at the end of the slice is finished in the next one
+        words = (carry + piece).split()
+        carry = words.pop() if words and not piece[-1].isspace() else ''
+        word_count += len(words)
+        _collect_emails_and_dates(words, emails, dates)
+    
+    if carry:
+        word_count += 1
+        _collect_emails_and_dates([carry], emails, dates)
+    
+    return {
+        "characters": len(text),
+        "words": word_count,
+        "vowels": vowel_count,
+        "consonants": consonant_count,
+        "is_palindrome": is_palindrome_two_pointer(text),
+        "emails": emails,
+        "dates": dates,
+    }
+
+def _collect_emails_and_dates(words, emails, dates):
+    """
+    Append the emails and dates among some words, in order.
+    
+    Args:
+        words (list): Words of the text
+        emails (list): Extracted email addresses, extended in place
+        dates (list): Extracted dates, extended in place
+    """
+    for word in [word for word in words if '@' in word]:
+        clean_word = word.strip(_TOKEN_PUNCTUATION)
+        if _is_email_address(clean_word):
+            emails.append(clean_word)
+    
+    for word in [word for word in words if '-' in word]:
+        clean_word = word.strip(_TOKEN_PUNCTUATION)
+        if _is_date(clean_word):
+            dates.append(clean_word)
+
+def parse_csv_line(line):
+    """
+    Parse a CSV line into fields.
+    
+    Args:
+        line (str): CSV line to parse
+    
+    Returns:
+        list: List of fields
+    """
+    if line is None:
+        raise ValueError("Line cannot be None")
+    
+    return line.split(',')
+
+def _iter_lines(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the lines of a source read in large blocks.
+    
+    Args:
+        source: String, file object or iterable of text chunks
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Yields:
+        str: Each line including its trailing newline, if any
+    """
+    pending = []
+    for chunk in _iter_text_chunks(source, chunk_size):
+        lines = chunk.split('\n')
+        if len(lines) == 1:
+            pending.append(chunk)
+            continue
+        
+        # The first piece completes the line carried over from earlier chunks
+        pending.append(lines[0])
+        yield ''.join(pending) + '\n'
+        for line in lines[1:-1]:
+            yield line + '\n'
+        pending = [lines[-1]] if lines[-1] else []
+    
+    if pending:
+        yield ''.join(pending)
+
+def iter_csv_records(source, delimiter=',', quotechar='"', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream CSV records from a string, file object or chunk iterator.
+    
+    Quoted fields follow RFC 4180: they may contain delimiters, doubled
+    quotes and newlines. Blank lines are skipped. Only the current record is
+    held in memory.
+    
+    Args:
+        source: CSV document as a string, file object or iterable of chunks
+        delimiter (str, optional): Field delimiter. Defaults to ",".
+        quotechar (str, optional): Quote character. Defaults to '"'.
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Yields:
+        list: The fields of each record
+    """
+    if delimiter is None or quotechar is None:
+        raise ValueError("Delimiter and quote character cannot be None")
+    
+    if len(delimiter) != 1 or len(quotechar) != 1:
+        raise ValueError("Delimiter and quote character must be single characters")
+    
+    reader = csv.reader(_iter_lines(source, chunk_size), delimiter=delimiter,
+                        quotechar=quotechar, strict=True)
+    try:
+        for record in reader:
+            if record:
+                yield record
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV on line {reader.line_num}: {e}")
+
+def iter_csv_batches(source, batch_size=1000, delimiter=',', quotechar='"', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream CSV records in lists of up to batch_size records.
+    
+    Args:
+        source: CSV document as a string, file object or iterable of chunks
+        batch_size (int, optional): Maximum number of records per batch
+        delimiter (str, optional): Field delimiter. Defaults to ",".
+        quotechar (str, optional): Quote character. Defaults to '"'.
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Yields:
+        list: A batch of records, each a list of fields
+    """
+    if not isinstance(batch_size, int) or batch_size < 1:
+        raise ValueError("Batch size must be a positive integer")
+    
+    batch = []
+    for record in iter_csv_records(source, delimiter, quotechar, chunk_size):
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    
+    if batch:
+        yield batch
+
+def iter_json_path(source, path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream the values at a path in a JSON document without loading it whole.
+    
+    The path is a dotted list of object keys and array steps, e.g.
+    "users[*].name" for the name of every user or "users[0]" for the first
+    user. Only the values found are decoded; everything else is skipped,
+    so memory use depends on the chunk size and the size of one value.
+    
+    Args:
+        source: JSON document as a string, file object or iterable of chunks
+        path (str): Path of the values to extract
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Yields:
+        The decoded value at each match of the path, in document order
+    """
+    if path is None:
+        raise ValueError("Path cannot be None")
+    
+    steps = _parse_json_path(path)
+    stream = _JsonStream(source, chunk_size)
+    if stream.peek() == '':
+        raise ValueError("Invalid JSON: empty document")
+    
+    yield from _iter_json_steps(stream, steps)
+    
+    if stream.peek() != '':
+        raise ValueError(f"Invalid JSON: extra data at offset {stream.offset()}")
+
+def map_json_path(source, path, function, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Apply a text function to each value at a path in a JSON document.
+    
+    For example map_json_path(f, "users[*].name", count_characters) yields
+    the length of every user name while reading f in bounded memory.
+    
+    Args:
+        source: JSON document as a string, file object or iterable of chunks
+        path (str): Path of the values to extract
+        function (callable): Function called with each value
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Yields:
+        The result of function for each value, in document order
+    """
+    if function is None:
+        raise ValueError("Function cannot be None")
+    
+    for value in iter_json_path(source, path, chunk_size):
+        yield function(value)
+
+def _parse_json_path(path):
+    """
+    Split a path such as "users[*].name" into steps.
+    
+    Args:
+        path (str): Path, optionally starting with "$"
+    
+    Returns:
+        list: Object keys as str, array indexes as int and None for [*]
+    """
+    steps = []
+    position = 1 if path.startswith('$') else 0
+    
+    while position < len(path):
+        match = _JSON_PATH_STEP.match(path, position)
+        if match is None or (match.group(1) is not None and steps and path[position] != '.'):
+            raise ValueError(f"Invalid JSON path: {path}")
+        key, index = match.groups()
+        if key is not None:
+            steps.append(key)
+        else:
+            steps.append(None if index == '*' else int(index))
+        position = match.end()
+    
+    return steps
+
+def _iter_json_steps(stream, steps):
+    """
+    Walk the next value of a JSON stream, following the remaining path steps.
+    
+    Args:
+        stream (_JsonStream): Stream positioned before a value
+        steps (list): Remaining steps from _parse_json_path
+    
+    Yields:
+        The decoded values the steps lead to
+    """
+    if not steps:
+        yield stream.decode()
+        return
+    
+    step = steps[0]
+    opening, closing = ('{', '}') if isinstance(step, str) else ('[', ']')
+    
+    # A value of the wrong kind has nothing at this path
+    if stream.peek() != opening:
+        stream.skip()
+        return
+    
+    stream.pos += 1
+    if stream.peek() == closing:
+        stream.pos += 1
+        return
+    
+    index = 0
+    while True:
+        if isinstance(step, str):
+            if stream.peek() != '"':
+                raise ValueError(f"Invalid JSON: expected a key at offset {stream.offset()}")
+            key = stream.decode()
+            stream.expect(':')
+            selected = key == step
+        else:
+            selected = step is None or step == index
+            index += 1
+        
+        if not selected:
+            stream.skip()
+        elif isinstance(step, str) or None in steps[1:]:
+            yield from _iter_json_steps(stream, steps[1:])
+        else:
+            # No wildcards left: decode the element whole and look up the
+            # rest of the path in memory, which is far faster than scanning
+            found, value = _lookup_json_steps(stream.decode(), steps[1:])
+            if found:
+                yield value
+        
+        separator = stream.peek()
+        stream.pos += 1
+        if separator == closing:
+            return
+        if separator != ',':
+            raise ValueError(f"Invalid JSON: expected ',' or {closing!r} at offset {stream.offset() - 1}")
+
+def _lookup_json_steps(value, steps):
+    """
+    Follow key and index steps through a decoded value.
+    
+    Args:
+        value: Decoded JSON value
+        steps (list): Object keys and array indexes
+    
+    Returns:
+        tuple: (found, value at the end of the steps)
+    """
+    for step in steps:
+        if isinstance(step, str):
+            if not isinstance(value, dict) or step not in value:
+                return False, None
+        elif not isinstance(value, list) or step >= len(value):
+            return False, None
+        value = value[step]
+    return True, value
+
+class _JsonStream:
+    """
+    A buffer over JSON text read in chunks.
+    
+    Text before pos has been consumed and is dropped the next time more
+    text is read, so the buffer holds at most about one chunk plus the
+    value being decoded.
+    """
+    
+    def __init__(self, source, chunk_size):
+        self._chunks = _iter_text_chunks(source, chunk_size)
+        self._dropped = 0  # Characters dropped from the front of the buffer
+        self.buffer = ''
+        self.pos = 0
+    
+    def offset(self):
+        """Return the offset of pos in the whole document."""
+        return self._dropped + self.pos
+    
+    def fill(self):
+        """
+        Drop the consumed text and read another chunk.
+        
+        Returns:
+            bool: False if the input is exhausted
+        """
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._dropped += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self):
+        """
+        Skip whitespace and return the next character.
+        
+        Returns:
+            str: The next character, or '' at the end of the input
+        """
+        while True:
+            self.pos = _JSON_WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+    
+    def expect(self, char):
+        """Consume char, which must be the next non-whitespace character."""
+        if self.peek() != char:
+            raise ValueError(f"Invalid JSON: expected {char!r} at offset {self.offset()}")
+        self.pos += 1
+    
+    def decode(self):
+        """Decode and consume the next value."""
+        char = self.peek()
+        if char == '':
+            raise ValueError("Invalid JSON: unexpected end of input")
+        
+        # A number or literal is only complete once something follows it
+        if char not in '[{"':
+            while _JSON_SCALAR_END.search(self.buffer, self.pos) is None and self.fill():
+                pass
+        
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # An error near the end of the buffer may just be a value
+                # that continues in the next chunk
+                truncated = e.msg.startswith('Unterminated string') or e.pos >= len(self.buffer) - 6
+                if truncated and self.fill():
+                    continue
+                raise ValueError(f"Invalid JSON at offset {self._dropped + e.pos}: {e.msg}")
+            self.pos = end
+            return value
+    
+    def skip(self):
+        """
+        Consume the next value without decoding it.
+        
+        Containers are scanned bracket by bracket and dropped as they are
+        read, so skipping a large value needs no more than a chunk of memory.
+        """
+        char = self.peek()
+        if char == '':
+            raise ValueError("Invalid JSON: unexpected end of input")
+        if char not in '[{':
+            self.decode()
+            return
+        
+        depth = 0
+        while True:
+            match = _JSON_STRUCTURE.search(self.buffer, self.pos)
+            if match is not None and match.group() != '"':
+                self.pos = match.end()
+                token = match.group()
+                if token in ('[', '{'):
+                    depth += 1
+                elif token in (']', '}'):
+                    depth -= 1
+                    if depth == 0:
+                        return
+                continue
+            
+            # Read on from here, keeping an unfinished string whole
+            self.pos = len(self.buffer) if match is None else match.start()
+            if not self.fill():
+                raise ValueError("Invalid JSON: unexpected end of input")
+
+def format_text_table(headers, rows):
+    """
+    Format data as a text table.
+    
+    Args:
+        headers (list): List of column headers
+        rows (list): List of row data (each row is a list)
+    
+    Returns:
+        str: Formatted text table
+    """
+    if headers is None or rows is None:
+        raise ValueError("Headers and rows cannot be None")
+    
+    # Validate that all rows have the same length as headers
+    for row in rows:
+        if len(row) != len(headers):
+            raise ValueError(f"Row length {len(row)} doesn't match header length {len(headers)}")
+    
+    # Calculate column widths
+    col_widths = [len(h) for h in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            col_widths[i] = max(col_widths[i], len(str(cell)))
+    
+    # Format header row
+    header_row = " | ".join(h.ljust(col_widths[i]) for i, h in enumerate(headers))
+    separator = "-+-".join("-" * w for w in col_widths)
+    
+    # Format data rows
+    data_rows = []
+    for row in rows:
+        data_rows.append(" | ".join(str(cell).ljust(col_widths[i]) for i, cell in enumerate(row)))
+    
+    # Combine all parts
+    table = f"{header_row}\n{separator}\n" + "\n".join(data_rows)
+    return table
+
+def write_text_table(headers, rows, sink, col_widths=None):
+    """
+    Write a text table to a file-like sink one line at a time.
+    
+    The output is the same as format_text_table, but the rows may come from
+    any iterable and the table is never built as a single string. Without
+    col_widths the widths are measured in a pre-pass: lists and tuples are
+    simply iterated twice, while other iterables are first spilled to a
+    temporary file. With col_widths no pre-pass is made; a cell wider than
+    its column is written in full.
+    
+    Args:
+        headers (list): List of column headers
+        rows: Iterable of row data (each row is a list)
+        sink: File-like object with a write() method
+        col_widths (list, optional): Column widths to use instead of measuring
+    
+    Returns:
+        int: Number of data rows written
+    """
+    if headers is None or rows is None:
+        raise ValueError("Headers and rows cannot be None")
+    
+    if sink is None:
+        raise ValueError("Sink cannot be None")
+    
+    spill = None
+    if col_widths is None:
+        if isinstance(rows, (list, tuple)):
+            col_widths = [len(h) for h in headers]
+            for row in rows:
+                _check_row_length(row, headers)
+                for i, cell in enumerate(row):
+                    col_widths[i] = max(col_widths[i], len(str(cell)))
+        else:
+            col_widths, spill = _spill_table_rows(headers, rows)
+            rows = csv.reader(spill)
+    else:
+        if len(col_widths) != len(headers):
+            raise ValueError(f"Width count {len(col_widths)} doesn't match header length {len(headers)}")
+        col_widths = [max(width, len(h)) for width, h in zip(col_widths, headers)]
+    
+    try:
+        header_row = " | ".join(h.ljust(col_widths[i]) for i, h in enumerate(headers))
+        separator = "-+-".join("-" * w for w in col_widths)
+        sink.write(f"{header_row}\n{separator}\n")
+        
+        count = 0
+        for row in rows:
+            _check_row_length(row, headers)
+            line = " | ".join(str(cell).ljust(col_widths[i]) for i, cell in enumerate(row))
+            sink.write(line if count == 0 else "\n" + line)
+            count += 1
+    finally:
+        if spill is not None:
+            spill.close()
+    
+    return count
+
+def _check_row_length(row, headers):
+    """Raise ValueError if a table row doesn't have one cell per header."""
+    if len(row) != len(headers):
+        raise ValueError(f"Row length {len(row)} doesn't match header length {len(headers)}")
+
+def _spill_table_rows(headers, rows):
+    """
+    Measure column widths while copying rows to a temporary file.
+    
+    Args:
+        headers (list): List of column headers
+        rows: Iterable of row data
+    
+    Returns:
+        tuple: (column widths, temporary file positioned at the first row)
+    """
+    col_widths = [len(h) for h in headers]
+    spill = tempfile.TemporaryFile("w+", encoding="utf-8", newline="")
+    try:
+        writer = csv.writer(spill)
+        for row in rows:
+            _check_row_length(row, headers)
+            cells = [str(cell) for cell in row]
+            for i, cell in enumerate(cells):
+                col_widths[i] = max(col_widths[i], len(cell))
+            writer.writerow(cells)
+        spill.seek(0)
+    except BaseException:
+        spill.close()
+        raise
+    return col_widths, spill
+
+def _collect_corpus_files(paths):
+    """
+    Expand a list of files and directories into a sorted list of files.
+    
+    Args:
+        paths (list): File and directory paths
+    
+    Returns:
+        list: Paths of all files, directories walked recursively
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    files.append(os.path.join(root, name))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise ValueError(f"Path not found: {path}")
+    return files
+
+def _analyze_corpus_file(path):
+    """
+    Run the corpus analyses on a single file.
+    
+    Args:
+        path (str): File to analyze
+    
+    Returns:
+        dict: Word, vowel and consonant counts plus extracted emails and dates
+    """
+    with open(path, encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    
+    vowels, consonants = count_vowels_and_consonants(text)
+    return {
+        "path": path,
+        "words": count_words(text),
+        "vowels": vowels,
+        "consonants": consonants,
+        "emails": extract_email_addresses(text),
+        "dates": extract_dates(text),
+    }
+
+def _analyze_corpus_file_instrumented(path):
+    """
+    Analyze one file in a worker and attach the stats recorded meanwhile.
+    
+    Args:
+        path (str): File to analyze
+    
+    Returns:
+        dict: Result of _analyze_corpus_file plus an "instrumentation" snapshot
+    """
+    _take_instrumentation_snapshot()
+    result = _analyze_corpus_file(path)
+    result["instrumentation"] = _take_instrumentation_snapshot()
+    return result
+
+def analyze_corpus(paths, workers=None, chunk_size=1):
+    """
+    Analyze a corpus of files in parallel using a process pool.
+    
+    Each file is analyzed with count_words, count_vowels_and_consonants,
+    extract_email_addresses and extract_dates in a worker process, and the
+    per-file results are merged into corpus totals.
+    
+    Args:
+        paths: A file or directory path, or a list of them
+        workers (int, optional): Number of worker processes. Defaults to None
+            (one per CPU). With 1 the files are analyzed in this process.
+        chunk_size (int, optional): Number of files sent to a worker at a time
+    
+    Returns:
+        dict: {"files": list of per-file results, "totals": corpus totals}
+    """
+    if paths is None:
+        raise ValueError("Paths cannot be None")
+    
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValueError("Workers must be a positive integer")
+    
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError("Chunk size must be a positive integer")
+    
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    files = _collect_corpus_files(paths)
+    
+    results = []
+    totals = {"files": 0, "words": 0, "vowels": 0, "consonants": 0, "emails": 0, "dates": 0}
+    
+    if workers == 1 or len(files) <= 1:
+        file_results = map(_analyze_corpus_file, files)
+        executor = None
+    elif instrumentation_enabled():
+        # Workers record their own stats and send them back with each result
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=enable_instrumentation)
+        file_results = executor.map(_analyze_corpus_file_instrumented, files, chunksize=chunk_size)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        file_results = executor.map(_analyze_corpus_file, files, chunksize=chunk_size)
+    
+    try:
+        for result in file_results:
+            if "instrumentation" in result:
+                _merge_instrumentation_snapshot(result.pop("instrumentation"))
+            results.append(result)
+            totals["files"] += 1
+            totals["words"] += result["words"]
+            totals["vowels"] += result["vowels"]
+            totals["consonants"] += result["consonants"]
+            totals["emails"] += len(result["emails"])
+            totals["dates"] += len(result["dates"])
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    return {"files": results, "totals": totals}
+
+def display_corpus_report(report, per_file=False):
+    """
+    Display the results of analyze_corpus.
+    
+    Args:
+        report (dict): Result returned by analyze_corpus
+        per_file (bool, optional): Also show one row per file
+    """
+    headers = ["File", "Words", "Vowels", "Consonants", "Emails", "Dates"]
+    
+    if per_file and report["files"]:
+        rows = [[r["path"], r["words"], r["vowels"], r["consonants"], len(r["emails"]), len(r["dates"])]
+                for r in report["files"]]
+        print("\nPer-file Results:")
+        print(format_text_table(headers, rows))
+    
+    totals = report["totals"]
+    print("\nCorpus Totals:")
+    print(format_text_table(["Files"] + headers[1:],
+                            [[totals[key] for key in ("files", "words", "vowels", "consonants", "emails", "dates")]]))
+
+def parse_log_line(line):
+    """
+    Parse one log line of the form "[2023-03-15 08:45:32] INFO: message - key=value".
+    
+    Args:
+        line (str): Log line, with or without its trailing newline
+    
+    Returns:
+        dict: "timestamp", "level", "message" and "fields" (dict of the
+            key=value pairs)
+    """
+    if line is None:
+        raise ValueError("Line cannot be None")
+    
+    match = _LOG_LINE_PATTERN.match(line)
+    if match is None:
+        raise ValueError(f"Not a log line: {line.rstrip()!r}")
+    
+    timestamp, level, rest = match.groups()
+    message, fields = _split_log_message(rest)
+    return {"timestamp": timestamp, "level": level, "message": message, "fields": fields}
+
+def _split_log_message(rest):
+    """
+    Split the text after the level into the message and its key=value pairs.
+    
+    The pairs are the whitespace-separated words containing '=' from the
+    first such word on; the message is the text before them, without a
+    trailing " -" separator.
+    
+    Args:
+        rest (str): Text following "LEVEL: "
+    
+    Returns:
+        tuple: (message, dict of key -> value); a key given twice keeps its
+            last value
+    """
+    equals = rest.find('=')
+    if equals < 0:
+        return rest.rstrip(), {}
+    
+    # Back up to the start of the word holding the first '='
+    start = equals
+    while start and not rest[start - 1].isspace():
+        start -= 1
+    
+    fields = {}
+    for word in rest[start:].split():
+        key, separator, value = word.partition('=')
+        if separator and key:
+            fields[key] = value
+    return rest[:start].rstrip(' -\t\r'), fields
+
+class LogColumns:
+    """
+    Parsed log lines stored column by column.
+    
+    timestamps, levels and messages are parallel lists with one entry per
+    parsed line. Each key seen in a key=value pair gets its own column,
+    returned by field(), holding None for lines without that key.
+    """
+    
+    def __init__(self):
+        self.timestamps = []
+        self.levels = []
+        self.messages = []
+        self.skipped = 0  # Lines that were not in the log format
+        self._fields = {}
+    
+    def __len__(self):
+        return len(self.timestamps)
+    
+    def append(self, timestamp, level, message, fields=()):
+        """
+        Add one parsed line.
+        
+        Args:
+            timestamp (str): Timestamp text
+            level (str): Log level
+            message (str): Message text
+            fields (iterable, optional): (key, value) pairs; a key given
+                twice keeps its last value
+        """
+        row = len(self.timestamps)
+        self.timestamps.append(timestamp)
+        self.levels.append(level)
+        self.messages.append(message)
+        for key, value in fields:
+            column = self._fields.get(key)
+            if column is None:
+                column = self._fields[key] = [None] * row
+            elif len(column) > row:
+                column[row] = value
+                continue
+            elif len(column) < row:
+                column.extend([None] * (row - len(column)))
+            column.append(value)
+    
+    def extend(self, other):
+        """
+        Add all lines of another LogColumns after the lines of this one.
+        
+        Args:
+            other (LogColumns): Columns to append
+        """
+        row = len(self)
+        for key in other.field_names():
+            column = self._fields.setdefault(key, [])
+            column.extend([None] * (row - len(column)))
+            column.extend(other._fields[key])
+        self.timestamps.extend(other.timestamps)
+        self.levels.extend(other.levels)
+        self.messages.extend(other.messages)
+        self.skipped += other.skipped
+    
+    def field_names(self):
+        """
+        List the keys seen in key=value pairs, in order of first appearance.
+        
+        Returns:
+            list: Field names
+        """
+        return list(self._fields)
+    
+    def field(self, name):
+        """
+        Get the column of values for one key.
+        
+        Args:
+            name (str): Field name
+        
+        Returns:
+            list: One value per line, None where the line lacks the key
+        """
+        column = self._fields.get(name)
+        if column is None:
+            return [None] * len(self)
+        if len(column) < len(self):
+            column.extend([None] * (len(self) - len(column)))
+        return column
+    
+    def level_counts(self):
+        """
+        Count the parsed lines per level.
+        
+        Returns:
+            dict: level -> number of lines
+        """
+        counts = {}
+        for level in self.levels:
+            counts[level] = counts.get(level, 0) + 1
+        return counts
+
+def parse_log_stream(source, levels=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parse the log lines of a string, file object or chunk iterator.
+    
+    Lines are matched a block at a time. When levels is given, the level
+    is checked as part of that match, so filtered-out lines are never split
+    into message and fields. Lines not in the log format are counted in the
+    result's skipped attribute.
+    
+    Args:
+        source: String, file object or iterable of text chunks
+        levels (iterable, optional): Levels to keep, e.g. ["ERROR", "WARNING"]
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Returns:
+        LogColumns: The parsed lines
+    """
+    if levels is not None:
+        levels = frozenset(levels)
+    
+    columns = LogColumns()
+    find_lines = _log_block_pattern(levels).findall
+    append = columns.append
+    
+    for block in _iter_line_blocks(source, chunk_size):
+        for timestamp, level, rest, filtered in find_lines(block):
+            if not timestamp:
+                # Either a log line at another level or not a log line at all
+                if not filtered:
+                    columns.skipped += 1
+                continue
+            
+            if '=' not in rest:
+                append(timestamp, level, rest.rstrip())
+                continue
+            
+            message, fields = _split_log_message(rest)
+            append(timestamp, level, message, fields.items())
+    
+    return columns
+
+@functools.lru_cache(maxsize=32)
+def _log_block_pattern(levels):
+    """
+    Build the pattern that classifies every non-blank line of a block.
+    
+    Args:
+        levels (frozenset): Levels to keep, or None for all
+    
+    Returns:
+        re.Pattern: Pattern whose findall() gives (timestamp, level, rest,
+            filtered) per line; timestamp is empty for lines not kept, and
+            filtered is non-empty for log lines at other levels
+    """
+    timestamp = r'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d'
+    if levels is None:
+        wanted = '[A-Za-z]+'
+    else:
+        wanted = '(?:' + '|'.join(re.escape(level) for level in sorted(levels)) + ')'
+    return re.compile(rf'^(?:\[({timestamp})\] ({wanted}): ?(.*)|(\[{timestamp}\] [A-Za-z]+:.*)|[^\S\n]*\S.*)$',
+                      re.MULTILINE)
+
+def _iter_line_blocks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the text of a source in blocks that end on line boundaries.
+    
+    Args:
+        source: String, file object or iterable of text chunks
+        chunk_size (int, optional): Buffer size used when reading files
+    
+    Yields:
+        str: Blocks of whole lines
+    """
+    carry = ''
+    for chunk in _iter_text_chunks(source, chunk_size):
+        cut = chunk.rfind('\n') + 1
+        if cut == 0:
+            carry += chunk
+            continue
+        yield carry + chunk[:cut]
+        carry = chunk[cut:]
+    
+    if carry:
+        yield carry
+
+def parse_log_file(path, levels=None, workers=None, range_size=LOG_RANGE_SIZE):
+    """
+    Parse a log file in parallel using a process pool.
+    
+    The file is cut into byte ranges that end on line boundaries; each
+    range is parsed by a worker and the columns are joined in file order.
+    
+    Args:
+        path (str): Log file to parse
+        levels (iterable, optional): Levels to keep, e.g. ["ERROR", "WARNING"]
+        workers (int, optional): Number of worker processes. Defaults to None
+            (one per CPU). With 1 the file is parsed in this process.
+        range_size (int, optional): Approximate bytes parsed per task
+    
+    Returns:
+        LogColumns: The parsed lines
+    """
+    if path is None:
+        raise ValueError("Path cannot be None")
+    
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValueError("Workers must be a positive integer")
+    
+    if not isinstance(range_size, int) or range_size < 1:
+        raise ValueError("Range size must be a positive integer")
+    
+    if levels is not None:
+        levels = frozenset(levels)
+    
+    ranges = _log_file_ranges(path, range_size)
+    columns = LogColumns()
+    
+    if workers == 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            columns.extend(_parse_log_range(path, start, end, levels))
+        return columns
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parts = executor.map(_parse_log_range, [path] * len(ranges), *zip(*ranges),
+                             [levels] * len(ranges))
+        for part in parts:
+            columns.extend(part)
+    return columns
+
+def _log_file_ranges(path, range_size):
+    """
+    Cut a file into byte ranges of about range_size that end after a newline.
+    
+    Args:
+        path (str): File to cut
+        range_size (int): Approximate bytes per range
+    
+    Returns:
+        list: (start, end) byte offsets
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    start = 0
+    
+    with open(path, 'rb') as f:
+        while start < size:
+            end = start + range_size
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            else:
+                end = size
+            ranges.append((start, end))
+            start = end
+    
+    return ranges
+
+def _parse_log_range(path, start, end, levels):
+    """
+    Parse the lines in one byte range of a log file.
+    
+    Args:
+        path (str): Log file
+        start (int): First byte of the range
+        end (int): Byte after the range
+        levels (frozenset): Levels to keep, or None for all
+    
+    Returns:
+        LogColumns: The parsed lines
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return parse_log_stream(data.decode('utf-8', errors='replace'), levels)
+
+class SampleRegistry:
+    """
+    Named text samples, either held in memory or backed by files.
+    
+    A file sample is memory-mapped the first time it is used and its text
+    is decoded once; later uses in the same session reuse both.
+    """
+    
+    def __init__(self):
+        # name -> [path, buffer, text]; path is None for in-memory samples
+        self._samples = {}
+    
+    def __contains__(self, name):
+        return name in self._samples
+    
+    def __len__(self):
+        return len(self._samples)
+    
+    def names(self):
+        """
+        List the sample names in the order they were added.
+        
+        Returns:
+            list: Sample names
+        """
+        return list(self._samples)
+    
+    def add_text(self, name, text):
+        """
+        Add an in-memory sample.
+        
+        Args:
+            name (str): Sample name
+            text (str): Sample text
+        """
+        if name is None or text is None:
+            raise ValueError("Name and text cannot be None")
+        
+        self._samples[name] = [None, None, text]
+    
+    def register_file(self, name, path):
+        """
+        Add a file sample; the file is not read until the sample is used.
+        
+        Args:
+            name (str): Sample name
+            path (str): File holding UTF-8 text
+        """
+        if name is None or path is None:
+            raise ValueError("Name and path cannot be None")
+        
+        if not os.path.isfile(path):
+            raise ValueError(f"Path not found: {path}")
+        
+        self._samples[name] = [path, None, None]
+    
+    def register_directory(self, path, prefix=""):
+        """
+        Add every file under a directory, named by its path relative to it.
+        
+        Args:
+            path (str): Directory to walk recursively
+            prefix (str, optional): Text put in front of each sample name
+        
+        Returns:
+            list: Names of the added samples
+        """
+        if path is None:
+            raise ValueError("Path cannot be None")
+        
+        if not os.path.isdir(path):
+            raise ValueError(f"Directory not found: {path}")
+        
+        names = []
+        for file_path in _collect_corpus_files([path]):
+            name = prefix + os.path.relpath(file_path, path).replace(os.sep, "/")
+            self.register_file(name, file_path)
+            names.append(name)
+        return names
+    
+    def get_buffer(self, name):
+        """
+        Get the raw bytes of a file sample, memory-mapping it on first use.
+        
+        Args:
+            name (str): Sample name
+        
+        Returns:
+            mmap or bytes: Contents of the file (UTF-8 encoded for in-memory samples)
+        """
+        entry = self._entry(name)
+        path, buffer, text = entry
+        if buffer is None:
+            if path is None:
+                buffer = text.encode('utf-8')
+            else:
+                with open(path, 'rb') as f:
+                    # Empty files cannot be memory-mapped
+                    if os.fstat(f.fileno()).st_size == 0:
+                        buffer = b''
+                    else:
+                        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            entry[1] = buffer
+        return buffer
     
-    # If there are no alphanumeric characters, it's not a palindrome
-    if not cleaned:
-        return False
+    def get_text(self, name):
+        """
+        Get the text of a sample, decoding a file sample on first use.
+        
+        Args:
+            name (str): Sample name
+        
+        Returns:
+            str: Sample text
+        """
+        entry = self._entry(name)
+        if entry[2] is None:
+            entry[2] = str(self.get_buffer(name), 'utf-8')
+        return entry[2]
     
-    return cleaned == cleaned[::-1]
+    def close(self):
+        """Release the memory maps of all loaded file samples."""
+        for entry in self._samples.values():
+            if isinstance(entry[1], mmap.mmap):
+                entry[1].close()
+            if entry[0] is not None:
+                entry[1] = None
+    
+    def _entry(self, name):
+        if name not in self._samples:
+            raise ValueError(f"Unknown sample: {name}")
+        return self._samples[name]
 
-def count_vowels_and_consonants(text):
+def create_sample_registry():
     """
-    Count vowels and consonants in text.
-    
-    Args:
-        text (str): Text to analyze
+    Create a registry holding the built-in samples from initialize_data().
     
     Returns:
-        tuple: (vowel_count, consonant_count)
+        SampleRegistry: Registry with the eleven menu samples
     """
-    if text is None:
-        raise ValueError("Text cannot be None")
-    
-    text = text.lower()
-    vowels = 'aeiou'
-    vowel_count = 0
-    consonant_count = 0
-    
-    for char in text:
-        if char.isalpha():
-            if char in vowels:
-                vowel_count += 1
-            else:
-                consonant_count += 1
+    names = ("Plain Text", "Formatted Text", "Code Snippet", "CSV Data", "JSON Data", "Log Entry",
+             "Palindrome", "Whitespace Text", "Mixed Case", "Text with Numbers", "URL")
     
-    return (vowel_count, consonant_count)
+    registry = SampleRegistry()
+    for name, text in zip(names, initialize_data()):
+        registry.add_text(name, text)
+    return registry
 
-def extract_email_addresses(text):
+class ResultCache:
     """
-    Extract email addresses from text using string methods.
+    Results of text functions, keyed by a hash of the text, the function
+    and its other arguments.
     
-    Args:
-        text (str): Text to analyze
+    Module-level functions are keyed by their module and qualified name;
+    lambdas, nested functions and other callables are keyed by the object
+    itself, so they never share results and are not written by save().
     
-    Returns:
-        list: List of extracted email addresses
+    The least recently used results are evicted once their estimated size
+    exceeds max_bytes. Cached results are shared between callers and must
+    not be modified.
+    
+    The digests of the last few text objects are remembered, so repeated
+    calls on the same string hash it only once, and the text is hashed a
+    slice at a time rather than encoded whole. Strings cannot be weakly
+    referenced, so the remembered texts are held and count against
+    max_bytes; together they take at most half of it.
+    
+    With a path, the cache is loaded from that file when created and
+    written back by save(); only use files you trust, since they are
+    unpickled.
     """
-    if text is None:
-        raise ValueError("Text cannot be None")
     
-    words = text.split()
-    emails = []
+    def __init__(self, max_bytes=RESULT_CACHE_BYTES, path=None):
+        if not isinstance(max_bytes, int) or max_bytes < 0:
+            raise ValueError("Max bytes must be a non-negative integer")
+        
+        self.max_bytes = max_bytes
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (result, estimated size)
+        self._size = 0
+        self._digests = OrderedDict()  # id(text) -> (text, digest, size)
+        self._digest_bytes = 0
+        
+        if path is not None and os.path.exists(path):
+            self.load(path)
     
-    for word in words:
-        # Simple email extraction logic using string methods
-        clean_word = word.strip(',.;:\'\"()[]{}')
+    def __len__(self):
+        return len(self._entries)
+    
+    def call(self, function, text, *args):
+        """
+        Return function(text, *args), computing it only on a cache miss.
         
-        # Check for @ symbol with text before and after
-        if '@' in clean_word:
-            parts = clean_word.split('@')
-            if len(parts) == 2 and parts[0] and parts[1] and '.' in parts[1]:
-                # Validate domain has at least one dot
-                domain_parts = parts[1].split('.')
-                if len(domain_parts) >= 2 and all(domain_parts):
-                    emails.append(clean_word)
+        Args:
+            function (callable): Text function, e.g. count_words
+            text (str): Text passed as the first argument
+            *args: Further arguments, e.g. the substring to find
+        
+        Returns:
+            The function's result
+        """
+        if function is None or text is None:
+            raise ValueError("Function and text cannot be None")
+        
+        key = self._key(_function_key(function), text, args)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        
+        self.misses += 1
+        result = function(text, *args)
+        self._store(key, result)
+        return result
     
-    return emails
-
-def extract_dates(text):
-    """
-    Extract dates in yyyy-mm-dd format from text.
+    def stats(self):
+        """
+        Get the cache statistics.
+        
+        Returns:
+            dict: hits, misses, evictions, entries, bytes and max_bytes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
     
-    Args:
-        text (str): Text to analyze
+    def clear(self):
+        """Remove every cached result; the statistics are kept."""
+        self._entries.clear()
+        self._digests.clear()
+        self._digest_bytes = 0
+        self._size = 0
     
-    Returns:
-        list: List of extracted dates
-    """
-    if text is None:
-        raise ValueError("Text cannot be None")
+    def save(self, path=None):
+        """
+        Write the cached results to a file.
+        
+        Args:
+            path (str, optional): File to write. Defaults to the cache's path.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No cache file given")
+        
+        # Only functions named by module and qualified name can be found again
+        entries = [(key, result) for key, (result, _) in self._entries.items() if isinstance(key[0], str)]
+        directory = os.path.dirname(os.path.abspath(path))
+        # Write to a temporary file first so a crash never leaves half a cache
+        f = tempfile.NamedTemporaryFile('wb', dir=directory, delete=False)
+        try:
+            with f:
+                pickle.dump({"version": _RESULT_CACHE_VERSION, "entries": entries}, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, path)
+        except BaseException:
+            os.unlink(f.name)
+            raise
     
-    words = text.split()
-    dates = []
+    def load(self, path=None):
+        """
+        Add the results saved in a file, oldest first.
+        
+        Args:
+            path (str, optional): File to read. Defaults to the cache's path.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No cache file given")
+        
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError) as e:
+            raise ValueError(f"Invalid cache file {path}: {e}")
+        
+        if not isinstance(data, dict) or data.get("version") != _RESULT_CACHE_VERSION:
+            raise ValueError(f"Invalid cache file {path}: unsupported format")
+        
+        for key, result in data["entries"]:
+            self._store(key, result)
     
-    for word in words:
-        # Clean the word
-        clean_word = word.strip(',.;:\'\"()[]{}')
-        
-        # Check if it matches date format yyyy-mm-dd
-        if len(clean_word) == 10 and clean_word[4] == '-' and clean_word[7] == '-':
-            year_part = clean_word[0:4]
-            month_part = clean_word[5:7]
-            day_part = clean_word[8:10]
-            
-            # Check if all parts are digits
-            if (year_part.isdigit() and month_part.isdigit() and day_part.isdigit()):
-                # Basic validation of month and day
-                year = int(year_part)
-                month = int(month_part)
-                day = int(day_part)
-                
-                if 1 <= month <= 12 and 1 <= day <= 31:
-                    dates.append(clean_word)
+    def _key(self, function_key, text, args):
+        """Build the key for one call."""
+        return (function_key, self._digest(text), len(text), repr(args))
     
-    return dates
+    def _digest(self, text):
+        """Hash a text, reusing the digest of a recently seen text object."""
+        # The text itself is held, so its id cannot be reused by another object
+        entry = self._digests.get(id(text))
+        if entry is not None and entry[0] is text:
+            self._digests.move_to_end(id(text))
+            return entry[1]
+        
+        hasher = hashlib.blake2b(digest_size=16)
+        for start in range(0, len(text), DEFAULT_CHUNK_SIZE):
+            hasher.update(text[start:start + DEFAULT_CHUNK_SIZE].encode('utf-8', 'surrogatepass'))
+        digest = hasher.digest()
+        
+        size = sys.getsizeof(text)
+        limit = self.max_bytes // 2
+        if size <= limit:
+            self._digests[id(text)] = (text, digest, size)
+            self._digest_bytes += size
+            self._size += size
+            while len(self._digests) > _RESULT_CACHE_DIGESTS or self._digest_bytes > limit:
+                _, (_, _, evicted_size) = self._digests.popitem(last=False)
+                self._digest_bytes -= evicted_size
+                self._size -= evicted_size
+            self._evict()
+        return digest
+    
+    def _store(self, key, result):
+        """Add a result and evict the least recently used ones over budget."""
+        size = _estimate_size(result) + _estimate_size(key)
+        if size > self.max_bytes - self._digest_bytes:
+            return
+        
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous[1]
+        self._entries[key] = (result, size)
+        self._size += size
+        self._evict()
+    
+    def _evict(self):
+        """Evict the least recently used results until within budget."""
+        while self._size > self.max_bytes and self._entries:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
 
-def parse_csv_line(line):
+def _function_key(function):
     """
-    Parse a CSV line into fields.
+    Identify a function in ResultCache keys.
     
     Args:
-        line (str): CSV line to parse
+        function (callable): Function whose results are cached
     
     Returns:
-        list: List of fields
+        "module.qualname" for a module-level function, otherwise the
+        callable itself, which is only meaningful within this process
     """
-    if line is None:
-        raise ValueError("Line cannot be None")
-    
-    return line.split(',')
+    if isinstance(function, types.FunctionType) and '<' not in function.__qualname__:
+        return f"{function.__module__}.{function.__qualname__}"
+    return function
 
-def format_text_table(headers, rows):
+def _estimate_size(value):
     """
-    Format data as a text table.
+    Estimate the memory used by a result, including what it contains.
     
     Args:
-        headers (list): List of column headers
-        rows (list): List of row data (each row is a list)
+        value: A result such as an int, str, list, tuple or dict
     
     Returns:
-        str: Formatted text table
+        int: Approximate size in bytes
     """
-    if headers is None or rows is None:
-        raise ValueError("Headers and rows cannot be None")
-    
-    # Validate that all rows have the same length as headers
-    for row in rows:
-        if len(row) != len(headers):
-            raise ValueError(f"Row length {len(row)} doesn't match header length {len(headers)}")
-    
-    # Calculate column widths
-    col_widths = [len(h) for h in headers]
-    for row in rows:
-        for i, cell in enumerate(row):
-            col_widths[i] = max(col_widths[i], len(str(cell)))
-    
-    # Format header row
-    header_row = " | ".join(h.ljust(col_widths[i]) for i, h in enumerate(headers))
-    separator = "-+-".join("-" * w for w in col_widths)
-    
-    # Format data rows
-    data_rows = []
-    for row in rows:
-        data_rows.append(" | ".join(str(cell).ljust(col_widths[i]) for i, cell in enumerate(row)))
-    
-    # Combine all parts
-    table = f"{header_row}\n{separator}\n" + "\n".join(data_rows)
-    return table
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_estimate_size(key) + _estimate_size(item) for key, item in value.items())
+    return size
 
 def display_text_analysis(text, analysis_type, result):
     """
@@ -437,30 +3732,31 @@ def display_text_analysis(text, analysis_type, result):
     print(f"Original text: {text}")
     print(f"Result: {result}")
 
-def main():
-    """Main program function."""
-    (plain_text, formatted_text, code_snippet, csv_data, json_data, 
-     log_entry, palindrome, whitespace_text, mixed_case, with_numbers, url) = initialize_data()
-    
-    # Create a dictionary for easy access to text samples
-    text_samples = {
-        "1": ("Plain Text", plain_text),
-        "2": ("Formatted Text", formatted_text),
-        "3": ("Code Snippet", code_snippet),
-        "4": ("CSV Data", csv_data),
-        "5": ("JSON Data", json_data),
-        "6": ("Log Entry", log_entry),
-        "7": ("Palindrome", palindrome),
-        "8": ("Whitespace Text", whitespace_text),
-        "9": ("Mixed Case", mixed_case),
-        "10": ("Text with Numbers", with_numbers),
-        "11": ("URL", url)
-    }
+def main(registry=None, cache=None):
+    """
+    Main program function.
+    
+    Args:
+        registry (SampleRegistry, optional): Samples offered in the menu.
+            Defaults to the built-in samples from create_sample_registry().
+        cache (ResultCache, optional): Cache for repeated analyses of the
+            same text. Defaults to a new in-memory cache.
+    """
+    if registry is None:
+        registry = create_sample_registry()
+    
+    if cache is None:
+        cache = ResultCache()
+    
+    # Create a dictionary for easy access to text samples; file samples are
+    # only read when they are first chosen
+    text_samples = {str(number): name for number, name in enumerate(registry.names(), 1)}
+    sample_prompt = f"Enter sample number (1-{len(text_samples)}) or 'c' for custom text: "
     
     while True:
         print("\n===== TEXT PROCESSING SYSTEM =====")
         print("Available Samples:")
-        for key, (name, _) in text_samples.items():
+        for key, name in text_samples.items():
             print(f"{key}. {name}")
         
         print("\nMain Menu:")
@@ -485,12 +3781,12 @@ def main():
             print("4. Count Vowels and Consonants")
             analysis_choice = input("Select analysis option (1-4): ")
             
-            sample_key = input("Enter sample number (1-11) or 'c' for custom text: ")
+            sample_key = input(sample_prompt)
             
             if sample_key.lower() == 'c':
                 text = input("Enter your text: ")
             elif sample_key in text_samples:
-                _, text = text_samples[sample_key]
+                text = registry.get_text(text_samples[sample_key])
             else:
                 print("Invalid sample number.")
                 continue
@@ -500,15 +3796,15 @@ def main():
                 display_text_analysis(text, "Character Count", count)
             
             elif analysis_choice == "2":
-                count = count_words(text)
+                count = cache.call(count_words, text)
                 display_text_analysis(text, "Word Count", count)
             
             elif analysis_choice == "3":
-                result = is_palindrome(text)
+                result = cache.call(is_palindrome, text)
                 display_text_analysis(text, "Palindrome Check", "Yes" if result else "No")
             
             elif analysis_choice == "4":
-                vowels, consonants = count_vowels_and_consonants(text)
+                vowels, consonants = cache.call(count_vowels_and_consonants, text)
                 display_text_analysis(text, "Vowels and Consonants", f"Vowels: {vowels}, Consonants: {consonants}")
             
             else:
@@ -523,12 +3819,12 @@ def main():
             print("5. Replace Substring")
             transform_choice = input("Select transformation option (1-5): ")
             
-            sample_key = input("Enter sample number (1-11) or 'c' for custom text: ")
+            sample_key = input(sample_prompt)
             
             if sample_key.lower() == 'c':
                 text = input("Enter your text: ")
             elif sample_key in text_samples:
-                _, text = text_samples[sample_key]
+                text = registry.get_text(text_samples[sample_key])
             else:
                 print("Invalid sample number.")
                 continue
@@ -570,12 +3866,12 @@ def main():
             print("5. Extract Dates")
             extraction_choice = input("Select extraction option (1-5): ")
             
-            sample_key = input("Enter sample number (1-11) or 'c' for custom text: ")
+            sample_key = input(sample_prompt)
             
             if sample_key.lower() == 'c':
                 text = input("Enter your text: ")
             elif sample_key in text_samples:
-                _, text = text_samples[sample_key]
+                text = registry.get_text(text_samples[sample_key])
             else:
                 print("Invalid sample number.")
                 continue
@@ -592,7 +3888,7 @@ def main():
             elif extraction_choice == "2":
                 substring = input("Enter substring to find: ")
                 try:
-                    positions = find_all_occurrences(text, substring)
+                    positions = cache.call(find_all_occurrences, text, substring)
                     if positions:
                         display_text_analysis(text, f"Find '{substring}'", f"Found at positions: {positions}")
                     else:
@@ -607,14 +3903,14 @@ def main():
                 display_text_analysis(text, f"Split by '{delimiter}'", result)
             
             elif extraction_choice == "4":
-                emails = extract_email_addresses(text)
+                emails = cache.call(extract_email_addresses, text)
                 if emails:
                     display_text_analysis(text, "Email Extraction", emails)
                 else:
                     display_text_analysis(text, "Email Extraction", "No emails found")
             
             elif extraction_choice == "5":
-                dates = extract_dates(text)
+                dates = cache.call(extract_dates, text)
                 if dates:
                     display_text_analysis(text, "Date Extraction", dates)
                 else:
@@ -656,8 +3952,8 @@ def main():
                     print(f"Error: {e}")
             
             elif formatting_choice == "3":
-                if "4" in text_samples:
-                    csv_lines = text_samples["4"][1].split('\n')
+                if "CSV Data" in registry:
+                    csv_lines = registry.get_text("CSV Data").split('\n')
                     line_idx = int(input(f"Enter line number to parse (0-{len(csv_lines)-1}): "))
                     
                     if 0 <= line_idx < len(csv_lines):
@@ -698,26 +3994,522 @@ def main():
         
         elif choice == "5":
             custom_text = input("Enter your custom text: ")
+            report = cache.call(analyze_text, custom_text)
             
             print("\nCustom Text Analysis:")
-            print(f"1. Length: {count_characters(custom_text)} characters")
-            print(f"2. Words: {count_words(custom_text)} words")
-            vowels, consonants = count_vowels_and_consonants(custom_text)
-            print(f"3. Contains: {vowels} vowels, {consonants} consonants")
+            print(f"1. Length: {report['characters']} characters")
+            print(f"2. Words: {report['words']} words")
+            print(f"3. Contains: {report['vowels']} vowels, {report['consonants']} consonants")
             
-            if is_palindrome(custom_text):
+            if report["is_palindrome"]:
                 print("4. This text is a palindrome")
             
-            emails = extract_email_addresses(custom_text)
+            emails = report["emails"]
             if emails:
                 print(f"5. Found email addresses: {', '.join(emails)}")
             
-            dates = extract_dates(custom_text)
+            dates = report["dates"]
             if dates:
                 print(f"6. Found dates: {', '.join(dates)}")
         
         else:
             print("Invalid choice. Please try again.")
 
+# Functions wrapped by enable_instrumentation()
+INSTRUMENTED_FUNCTIONS = (
+    "count_characters", "count_words", "extract_substring", "find_all_occurrences",
+    "replace_substring", "split_text", "join_text", "to_uppercase", "to_lowercase",
+    "capitalize_text", "strip_whitespace", "format_text_with_variables", "is_palindrome",
+    "count_vowels_and_consonants", "extract_email_addresses", "extract_dates",
+    "parse_csv_line", "format_text_table", "analyze_text", "replace_substrings",
+    "find_all_occurrences_multi", "count_characters_stream", "count_words_stream",
+    "iter_split", "to_uppercase_stream", "to_lowercase_stream", "capitalize_text_stream",
+    "compile_template", "is_palindrome_two_pointer", "is_palindrome_file",
+    "iter_email_addresses", "iter_dates", "iter_csv_records", "iter_csv_batches",
+    "iter_json_path", "map_json_path", "write_text_table", "analyze_corpus",
+    "parse_log_line", "parse_log_stream", "parse_log_file",
+)
+
+# Latency samples kept per function for the percentiles
+_LATENCY_SAMPLE_SIZE = 10000
+
+# Original functions while instrumentation is enabled, and collected stats
+_uninstrumented_functions = {}
+_instrumentation_stats = {}
+
+class _FunctionStats:
+    """Call statistics for one instrumented function."""
+    
+    __slots__ = ("calls", "errors", "total_seconds", "total_input_bytes", "max_input_bytes", "samples", "random")
+    
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.total_input_bytes = 0
+        self.max_input_bytes = 0
+        self.samples = []
+        # A private generator, so sampling never disturbs a caller's seeded random module
+        self.random = random.Random()
+    
+    def record(self, seconds, input_bytes):
+        """Add one call that took `seconds` on `input_bytes` bytes of input."""
+        self.calls += 1
+        self.total_seconds += seconds
+        self.total_input_bytes += input_bytes
+        if input_bytes > self.max_input_bytes:
+            self.max_input_bytes = input_bytes
+        
+        # Reservoir sampling keeps a uniform sample of all latencies
+        if len(self.samples) < _LATENCY_SAMPLE_SIZE:
+            self.samples.append(seconds)
+        else:
+            slot = self.random.randrange(self.calls)
+            if slot < _LATENCY_SAMPLE_SIZE:
+                self.samples[slot] = seconds
+    
+    def merge(self, other):
+        """Add the statistics of another _FunctionStats to these."""
+        self.calls += other.calls
+        self.errors += other.errors
+        self.total_seconds += other.total_seconds
+        self.total_input_bytes += other.total_input_bytes
+        self.max_input_bytes = max(self.max_input_bytes, other.max_input_bytes)
+        self.samples.extend(other.samples)
+        if len(self.samples) > _LATENCY_SAMPLE_SIZE:
+            self.samples = self.random.sample(self.samples, _LATENCY_SAMPLE_SIZE)
+
+def _instrument(name, function):
+    """
+    Wrap a function so each call is timed and recorded under its name.
+    
+    A generator is timed across all of its steps, and recorded when it is
+    exhausted, fails or is closed.
+    
+    Args:
+        name (str): Name the statistics are recorded under
+        function (callable): Function to wrap
+    
+    Returns:
+        callable: The wrapped function
+    """
+    def record(elapsed, args, failed):
+        stats = _instrumentation_stats.get(name)
+        if stats is None:
+            stats = _instrumentation_stats[name] = _FunctionStats()
+        stats.record(elapsed, sum(_input_bytes(arg) for arg in args))
+        if failed:
+            stats.errors += 1
+    
+    def timed_generator(generator, elapsed, args):
+        failed = True
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - start
+                try:
+                    yield item
+                except GeneratorExit:
+                    # Stopping early is not a failure
+                    generator.close()
+                    failed = False
+                    raise
+            failed = False
+        finally:
+            record(elapsed, args, failed)
+    
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException:
+            record(time.perf_counter() - start, args, True)
+            raise
+        if isinstance(result, types.GeneratorType):
+            return timed_generator(result, time.perf_counter() - start, args)
+        record(time.perf_counter() - start, args, False)
+        return result
+    
+    return wrapper
+
+def _input_bytes(value):
+    """
+    Measure the text passed as one argument, in UTF-8 bytes.
+    
+    Strings count their encoded size, buffers and TextViews their length,
+    and lists or tuples the text they hold. Other arguments, such as file
+    objects and iterators, count as 0.
+    
+    Args:
+        value: An argument of an instrumented call
+    
+    Returns:
+        int: Number of bytes
+    """
+    if isinstance(value, str):
+        if value.isascii():
+            return len(value)
+        # Encoded a slice at a time so no full copy of the text is made
+        return sum(len(value[start:start + DEFAULT_CHUNK_SIZE].encode('utf-8', 'surrogatepass'))
+                   for start in range(0, len(value), DEFAULT_CHUNK_SIZE))
+    if isinstance(value, (bytes, bytearray, mmap.mmap, TextView)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sum(_input_bytes(item) for item in value)
+    return 0
+
+def enable_instrumentation():
+    """
+    Start recording call counts, input sizes and latencies.
+    
+    Input sizes are the UTF-8 bytes of the text passed in all arguments.
+    
+    The public functions are replaced by timing wrappers in this module, so
+    calls made through the module (including those between its functions)
+    are recorded. While disabled, the original functions are in place and
+    there is no overhead at all. Names imported with "from text_processor
+    import ..." before enabling keep pointing at the unwrapped functions.
+    """
+    if _uninstrumented_functions:
+        return
+    
+    module_globals = globals()
+    for name in INSTRUMENTED_FUNCTIONS:
+        _uninstrumented_functions[name] = module_globals[name]
+        module_globals[name] = _instrument(name, module_globals[name])
+
+def disable_instrumentation():
+    """Stop recording and restore the original functions. Stats are kept."""
+    globals().update(_uninstrumented_functions)
+    _uninstrumented_functions.clear()
+
+def instrumentation_enabled():
+    """
+    Check whether instrumentation is on.
+    
+    Returns:
+        bool: True if calls are being recorded
+    """
+    return bool(_uninstrumented_functions)
+
+def reset_instrumentation():
+    """Discard all recorded statistics."""
+    _instrumentation_stats.clear()
+
+def get_instrumentation_stats():
+    """
+    Summarize the recorded statistics.
+    
+    Returns:
+        dict: Function name mapped to a dict with "calls", "errors",
+            "total_seconds", "mean_seconds", "p50_seconds", "p99_seconds",
+            "total_input_bytes" and "max_input_bytes"
+    """
+    summary = {}
+    for name, stats in _instrumentation_stats.items():
+        samples = sorted(stats.samples)
+        summary[name] = {
+            "calls": stats.calls,
+            "errors": stats.errors,
+            "total_seconds": stats.total_seconds,
+            "mean_seconds": stats.total_seconds / stats.calls,
+            "p50_seconds": samples[min(len(samples) - 1, len(samples) // 2)],
+            "p99_seconds": samples[min(len(samples) - 1, len(samples) * 99 // 100)],
+            "total_input_bytes": stats.total_input_bytes,
+            "max_input_bytes": stats.max_input_bytes,
+        }
+    return summary
+
+def format_instrumentation_stats():
+    """
+    Format the recorded statistics as a text table, busiest function first.
+    
+    Returns:
+        str: Formatted text table
+    """
+    stats = get_instrumentation_stats()
+    if not stats:
+        return "No instrumented calls recorded."
+    
+    headers = ["Function", "Calls", "Errors", "Total (ms)", "p50 (ms)", "p99 (ms)", "Input bytes", "Max input bytes"]
+    rows = []
+    for name, s in sorted(stats.items(), key=lambda item: item[1]["total_seconds"], reverse=True):
+        rows.append([name, s["calls"], s["errors"], f"{s['total_seconds'] * 1000:.3f}",
+                     f"{s['p50_seconds'] * 1000:.3f}", f"{s['p99_seconds'] * 1000:.3f}",
+                     s["total_input_bytes"], s["max_input_bytes"]])
+    
+    # The original function, so printing the stats does not add to them
+    return _uninstrumented_functions.get("format_text_table", format_text_table)(headers, rows)
+
+def _take_instrumentation_snapshot():
+    """Return the raw statistics recorded so far and start afresh."""
+    snapshot = dict(_instrumentation_stats)
+    _instrumentation_stats.clear()
+    return snapshot
+
+def _merge_instrumentation_snapshot(snapshot):
+    """Add statistics recorded in another process to this one's."""
+    for name, other in snapshot.items():
+        stats = _instrumentation_stats.get(name)
+        if stats is None:
+            _instrumentation_stats[name] = other
+        else:
+            stats.merge(other)
+
+# Commands available to run_script: function name, argument types after the
+# file, and how many of those arguments are required. Functions are looked
+# up by name when a command runs.
+SCRIPT_COMMANDS = {
+    "chars": ("count_characters", (), 0),
+    "words": ("count_words", (), 0),
+    "palindrome": ("is_palindrome", (), 0),
+    "vowels": ("count_vowels_and_consonants", (), 0),
+    "analyze": ("analyze_text", (), 0),
+    "upper": ("to_uppercase", (), 0),
+    "lower": ("to_lowercase", (), 0),
+    "capitalize": ("capitalize_text", (), 0),
+    "strip": ("strip_whitespace", (), 0),
+    "substring": ("extract_substring", (int, int), 2),
+    "find": ("find_all_occurrences", (str,), 1),
+    "replace": ("replace_substring", (str, str), 2),
+    "split": ("split_text", (str,), 0),
+    "emails": ("extract_email_addresses", (), 0),
+    "dates": ("extract_dates", (), 0),
+}
+
+# Functions no slower than hashing their text, or whose results are as large
+# as the text; they are called directly rather than through the ResultCache
+_UNCACHED_FUNCTIONS = frozenset(("count_characters", "to_uppercase", "to_lowercase", "capitalize_text",
+                                 "strip_whitespace", "extract_substring", "replace_substring", "split_text"))
+
+# Number of result lines collected before run_script writes them out
+_SCRIPT_FLUSH_LINES = 1000
+
+def run_script(lines, output=None, machine_readable=False, cache=None):
+    """
+    Run a script of text processing commands without any prompts.
+    
+    Each line holds a command, a file and the command's arguments, for
+    example "words notes.txt" or "replace notes.txt old new". Arguments
+    containing spaces can be quoted. Blank lines and lines starting with
+    "#" are skipped. Every file is memory-mapped and decoded once, then
+    reused by later commands.
+    
+    Args:
+        lines (iterable): Script lines, e.g. an open file or sys.stdin
+        output (file, optional): Where results are written. Defaults to sys.stdout.
+        machine_readable (bool, optional): Write one JSON object per command
+            instead of plain text
+        cache (ResultCache, optional): Cache for repeated commands on the
+            same text. Defaults to a new in-memory cache.
+    
+    Returns:
+        int: Number of commands that failed
+    """
+    if lines is None:
+        raise ValueError("Script lines cannot be None")
+    
+    if output is None:
+        output = sys.stdout
+    
+    if cache is None:
+        cache = ResultCache()
+    
+    samples = SampleRegistry()
+    pending = []
+    failures = 0
+    
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        
+        command = line
+        try:
+            words = shlex.split(line)
+            command, args = words[0], words[1:]
+            result = _run_script_command(command, args, samples, cache)
+            ok = True
+        except (ValueError, OSError) as e:
+            result = str(e)
+            ok = False
+            failures += 1
+        
+        if machine_readable:
+            record = {"line": line_number, "command": command, "ok": ok}
+            record["result" if ok else "error"] = result
+            pending.append(json.dumps(record))
+        elif ok:
+            # Quote strings so every result stays on one line
+            shown = repr(result) if isinstance(result, str) else result
+            pending.append(f"{line_number}: {command}: {shown}")
+        else:
+            pending.append(f"{line_number}: {command}: Error: {result}")
+        
+        if len(pending) >= _SCRIPT_FLUSH_LINES:
+            output.write("\n".join(pending) + "\n")
+            pending = []
+    
+    if pending:
+        output.write("\n".join(pending) + "\n")
+    output.flush()
+    samples.close()
+    return failures
+
+def _run_script_command(command, args, samples, cache):
+    """
+    Run one script command.
+    
+    Args:
+        command (str): Command name from SCRIPT_COMMANDS
+        args (list): The file followed by the command's arguments
+        samples (SampleRegistry): Files already loaded by the script
+        cache (ResultCache): Results of earlier commands
+    
+    Returns:
+        The result of the text processing function
+    """
+    if command not in SCRIPT_COMMANDS:
+        raise ValueError(f"Unknown command: {command}")
+    
+    function_name, arg_types, required = SCRIPT_COMMANDS[command]
+    if not args or not required <= len(args) - 1 <= len(arg_types):
+        raise ValueError(f"Usage: {command} <file>{''.join(f' <{t.__name__}>' for t in arg_types)}")
+    
+    path = args[0]
+    if path not in samples:
+        samples.register_file(path, path)
+    
+    try:
+        values = [convert(value) for convert, value in zip(arg_types, args[1:])]
+    except ValueError:
+        raise ValueError(f"Invalid arguments for {command}: {' '.join(args[1:])}")
+    
+    function = globals()[function_name]
+    if function_name in _UNCACHED_FUNCTIONS:
+        return function(samples.get_text(path), *values)
+    return cache.call(function, samples.get_text(path), *values)
+
+def run_cli(argv=None):
+    """
+    Command-line entry point.
+    
+    Without a command the interactive menu is started. The "analyze"
+    command runs analyze_corpus over files and directories, and "run"
+    passes a script file or standard input to run_script. With --stats the
+    functions are instrumented and their statistics printed on exit.
+    
+    Args:
+        argv (list, optional): Command-line arguments. Defaults to sys.argv[1:].
+    
+    Returns:
+        int: Process exit status
+    """
+    parser = argparse.ArgumentParser(description="Text Processing System")
+    parser.add_argument("--stats", action="store_true",
+                        help="record per-function timings and print them to stderr on exit")
+    parser.add_argument("--sample", action="append", default=[], metavar="PATH",
+                        help="add a file or directory to the menu's samples (repeatable)")
+    parser.add_argument("--cache-file", metavar="PATH",
+                        help="keep analysis results in this file between runs")
+    parser.add_argument("--cache-size", type=int, default=RESULT_CACHE_BYTES // (1024 * 1024), metavar="MB",
+                        help="memory budget of the result cache in MB")
+    commands = parser.add_subparsers(dest="command")
+    
+    analyze_parser = commands.add_parser("analyze", help="analyze a corpus of files in parallel")
+    analyze_parser.add_argument("paths", nargs="+", help="files or directories to analyze")
+    analyze_parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    analyze_parser.add_argument("--chunk-size", type=int, default=1, help="files sent to a worker at a time")
+    analyze_parser.add_argument("--per-file", action="store_true", help="show results for every file")
+    
+    run_parser = commands.add_parser("run", help="run a script of commands without prompts")
+    run_parser.add_argument("script", nargs="?", default="-", help="script file, or - for standard input")
+    run_parser.add_argument("--json", action="store_true", help="write one JSON result per command")
+    
+    args = parser.parse_args(argv)
+    
+    if args.stats:
+        enable_instrumentation()
+    try:
+        return _run_cli_command(args)
+    finally:
+        if args.stats:
+            print("\nFunction Statistics:", file=sys.stderr)
+            print(format_instrumentation_stats(), file=sys.stderr)
+
+def _run_cli_command(args):
+    """
+    Run the command selected on the command line.
+    
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+    
+    Returns:
+        int: Process exit status
+    """
+    if args.command == "analyze":
+        try:
+            report = analyze_corpus(args.paths, workers=args.workers, chunk_size=args.chunk_size)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        display_corpus_report(report, per_file=args.per_file)
+        return 0
+    
+    try:
+        cache = ResultCache(args.cache_size * 1024 * 1024, args.cache_file)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    try:
+        return _run_cached_command(args, cache)
+    finally:
+        if args.cache_file:
+            cache.save()
+
+def _run_cached_command(args, cache):
+    """
+    Run the interactive menu or a script with a result cache.
+    
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments
+        cache (ResultCache): Cache shared by the command's analyses
+    
+    Returns:
+        int: Process exit status
+    """
+    if args.command is None:
+        registry = create_sample_registry()
+        try:
+            for path in args.sample:
+                if os.path.isdir(path):
+                    registry.register_directory(path)
+                else:
+                    registry.register_file(os.path.basename(path), path)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        try:
+            main(registry, cache)
+        finally:
+            registry.close()
+        return 0
+    
+    if args.script == "-":
+        failures = run_script(sys.stdin, machine_readable=args.json, cache=cache)
+    else:
+        with open(args.script, encoding="utf-8") as f:
+            failures = run_script(f, machine_readable=args.json, cache=cache)
+    return 1 if failures else 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(run_cli())
\ No newline at end of file
@@ -0,0 +1,475 @@
+"""
+Text Processing Service
+Serves the text_processor functions to other local programs over TCP or a Unix socket.
+
+Usage:
+    python text_service.py [--host HOST] [--port PORT] [--unix PATH] [--workers N]
+        [--batch-size N] [--batch-delay SECONDS] [--max-pending N] [--max-batches N]
+        [--max-in-flight N]
+
+Each request is one line of JSON, for example
+    {"id": 1, "function": "count_words", "args": ["some text"]}
+and is answered by one line of JSON with the same id, either
+    {"id": 1, "ok": true, "result": 2}
+or, if the call failed,
+    {"id": 1, "ok": false, "error": "ValueError: Text cannot be None"}
+
+Requests arriving close together, from any connection, are sent to the
+worker pool as one batch. At most --max-pending requests wait for a batch
+and at most --max-in-flight are unanswered per connection; beyond that the
+server stops reading, so fast clients are slowed down instead of growing
+the server's memory.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import text_processor
+
+# Functions that can be called through the service
+SERVICE_FUNCTIONS = (
+    "count_characters",
+    "count_words",
+    "extract_substring",
+    "find_all_occurrences",
+    "find_all_occurrences_multi",
+    "replace_substring",
+    "replace_substrings",
+    "split_text",
+    "join_text",
+    "to_uppercase",
+    "to_lowercase",
+    "capitalize_text",
+    "strip_whitespace",
+    "format_text_with_variables",
+    "is_palindrome",
+    "count_vowels_and_consonants",
+    "extract_email_addresses",
+    "extract_dates",
+    "parse_csv_line",
+    "format_text_table",
+    "analyze_text",
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Longest request line accepted, in bytes
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+def _run_batch(calls):
+    """
+    Run a batch of calls in a worker.
+
+    Args:
+        calls (list): (function name, args, kwargs) tuples
+
+    Returns:
+        list: (ok, result or error message) for each call, in order
+    """
+    results = []
+    for name, args, kwargs in calls:
+        try:
+            results.append((True, getattr(text_processor, name)(*args, **kwargs)))
+        except Exception as e:
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+def _parse_request(line):
+    """
+    Parse one request line.
+
+    Args:
+        line (bytes): JSON request
+
+    Returns:
+        tuple: (request id, (function name, args, kwargs)); the call is
+            replaced by an error message if the request is invalid
+    """
+    try:
+        request = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return None, f"Invalid request: {e}"
+
+    if not isinstance(request, dict):
+        return None, "Invalid request: expected a JSON object"
+
+    request_id = request.get("id")
+    name = request.get("function")
+    args = request.get("args", [])
+    kwargs = request.get("kwargs", {})
+    if name not in SERVICE_FUNCTIONS:
+        return request_id, f"Unknown function: {name}"
+    if not isinstance(args, list) or not isinstance(kwargs, dict):
+        return request_id, "Invalid request: args must be a list and kwargs an object"
+
+    return request_id, (name, args, kwargs)
+
+class TextService:
+    """
+    An asyncio server that runs text_processor functions in micro-batches.
+
+    Requests from all connections go into one bounded queue. A batcher
+    takes up to batch_size of them, waiting at most batch_delay seconds
+    for a batch to fill, and sends each batch to the worker pool in a
+    single dispatch.
+    """
+
+    def __init__(self, workers=None, batch_size=64, batch_delay=0.002, max_pending=1024,
+                 max_batches=None, max_in_flight=256):
+        """
+        Args:
+            workers (int, optional): Worker processes. Defaults to None (one
+                per CPU). With 1 batches run in a worker thread of this process.
+            batch_size (int, optional): Most requests sent in one dispatch
+            batch_delay (float, optional): Seconds to wait for a batch to fill
+            max_pending (int, optional): Requests that may wait for a batch
+            max_batches (int, optional): Batches that may run at once.
+                Defaults to the number of workers.
+            max_in_flight (int, optional): Unanswered requests per connection
+        """
+        for name, value in (("Batch size", batch_size), ("Max pending", max_pending),
+                            ("Max in flight", max_in_flight)):
+            if not isinstance(value, int) or value < 1:
+                raise ValueError(f"{name} must be a positive integer")
+
+        if workers is not None and (not isinstance(workers, int) or workers < 1):
+            raise ValueError("Workers must be a positive integer")
+
+        if max_batches is not None and (not isinstance(max_batches, int) or max_batches < 1):
+            raise ValueError("Max batches must be a positive integer")
+
+        if not isinstance(batch_delay, (int, float)) or batch_delay < 0:
+            raise ValueError("Batch delay must be a non-negative number")
+
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_pending = max_pending
+        self.max_batches = max_batches or workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight
+        self.address = None
+        self.request_count = 0
+        self.batch_count = 0
+        self._server = None
+        self._executor = None
+        self._queue = None
+        self._batch_slots = None
+        self._batcher = None
+        self._dispatches = set()
+        self._connections = {}  # Connection handler task -> its writer
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """
+        Start listening and processing requests.
+
+        Args:
+            host (str, optional): Address to listen on
+            port (int, optional): TCP port; 0 picks a free one
+            path (str, optional): Listen on this Unix socket instead of TCP
+
+        Returns:
+            The address being served: (host, port), or the socket path
+        """
+        if self._server is not None:
+            raise ValueError("Service is already running")
+
+        if self.workers == 1:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._batch_slots = asyncio.Semaphore(self.max_batches)
+        self._batcher = asyncio.create_task(self._batch_requests())
+
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path,
+                                                           limit=MAX_REQUEST_SIZE)
+            self.address = path
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port,
+                                                      limit=MAX_REQUEST_SIZE)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        return self.address
+
+    async def serve_forever(self):
+        """Serve requests until the task is cancelled."""
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Stop listening, finish the running batches and shut the workers down."""
+        if self._server is None:
+            return
+
+        self._server.close()
+        await self._server.wait_closed()
+
+        # Hang up on the clients; requests already read are still processed
+        for writer in self._connections.values():
+            writer.close()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+
+        self._batcher.cancel()
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+        self._executor.shutdown()
+        self._server = None
+
+    async def _handle_connection(self, reader, writer):
+        """Read the requests of one connection and write back the responses."""
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        write_lock = asyncio.Lock()
+        responders = set()
+        loop = asyncio.get_running_loop()
+        handler = asyncio.current_task()
+        self._connections[handler] = writer
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # The request is too long to buffer; the stream cannot resync
+                    await self._write(writer, write_lock, None, (False, "Request too large"))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                # Stop reading while this connection has too many open requests
+                await in_flight.acquire()
+                future = loop.create_future()
+                request_id, call = _parse_request(line)
+                if isinstance(call, str):
+                    future.set_result((False, call))
+                else:
+                    # Waits here while the queue is full, which is the back-pressure
+                    await self._queue.put((call, future))
+
+                responder = asyncio.create_task(self._respond(writer, write_lock, request_id, future, in_flight))
+                responders.add(responder)
+                responder.add_done_callback(responders.discard)
+
+            if responders:
+                await asyncio.gather(*responders)
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[handler]
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, writer, write_lock, request_id, future, in_flight):
+        """Wait for one result and write its response."""
+        try:
+            await self._write(writer, write_lock, request_id, await future)
+        finally:
+            in_flight.release()
+
+    async def _write(self, writer, write_lock, request_id, outcome):
+        """Write one response line."""
+        ok, value = outcome
+        response = {"id": request_id, "ok": ok, "result" if ok else "error": value}
+        try:
+            data = json.dumps(response)
+        except (TypeError, ValueError) as e:
+            data = json.dumps({"id": request_id, "ok": False, "error": f"Result is not JSON serializable: {e}"})
+
+        async with write_lock:
+            # Nobody is left to read the answer once the connection is closing
+            if writer.is_closing():
+                return
+            writer.write(data.encode("utf-8") + b"\n")
+            await writer.drain()
+
+    async def _batch_requests(self):
+        """Collect queued requests into batches and dispatch them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_delay
+
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # With every batch slot busy, requests pile up in the queue instead
+            await self._batch_slots.acquire()
+            dispatch = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(dispatch)
+            dispatch.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch):
+        """Run one batch in the worker pool and hand out the results."""
+        loop = asyncio.get_running_loop()
+        calls = [call for call, _ in batch]
+        self.request_count += len(batch)
+        self.batch_count += 1
+
+        try:
+            results = await loop.run_in_executor(self._executor, _run_batch, calls)
+        except Exception as e:
+            # e.g. a result that cannot be sent back from a worker process
+            results = [(False, f"{type(e).__name__}: {e}")] * len(batch)
+        finally:
+            self._batch_slots.release()
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+class TextServiceClient:
+    """
+    A client for TextService that can have many requests open at once.
+
+    Use TextServiceClient.connect() to create one. Concurrent call()s share
+    the connection, so the server can batch them together.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._pending = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """
+        Connect to a running service.
+
+        Args:
+            host (str, optional): Service host
+            port (int, optional): Service TCP port
+            path (str, optional): Connect to this Unix socket instead of TCP
+
+        Returns:
+            TextServiceClient: The connected client
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=MAX_REQUEST_SIZE)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=MAX_REQUEST_SIZE)
+        return cls(reader, writer)
+
+    async def call(self, function, *args, **kwargs):
+        """
+        Call a text_processor function on the service.
+
+        Args:
+            function (str): Name from SERVICE_FUNCTIONS
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            The function's result, as decoded from JSON
+        """
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        request = {"id": request_id, "function": function, "args": list(args), "kwargs": kwargs}
+        try:
+            self._writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await self._writer.drain()
+        except BaseException:
+            self._pending.pop(request_id, None)
+            raise
+
+        ok, value = await future
+        if ok is None:
+            raise ConnectionError(value)
+        if not ok:
+            raise ValueError(value)
+        return value
+
+    async def close(self):
+        """Close the connection."""
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._receiver.cancel()
+
+    async def _receive(self):
+        """Match responses to the calls waiting for them."""
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    ok = response.get("ok", False)
+                    future.set_result((ok, response.get("result" if ok else "error")))
+        finally:
+            # ok=None tells call() the connection is gone
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_result((None, "Connection to the text service closed"))
+            self._pending.clear()
+
+def main(argv=None):
+    """
+    Run the service until interrupted.
+
+    Args:
+        argv (list, optional): Command-line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit status
+    """
+    parser = argparse.ArgumentParser(description="Serve the text_processor functions over a socket")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default {DEFAULT_PORT})")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=64, help="most requests per dispatch")
+    parser.add_argument("--batch-delay", type=float, default=0.002, help="seconds to wait for a batch to fill")
+    parser.add_argument("--max-pending", type=int, default=1024, help="requests that may wait for a batch")
+    parser.add_argument("--max-batches", type=int, default=None, help="batches that may run at once")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="unanswered requests per connection")
+    args = parser.parse_args(argv)
+
+    try:
+        service = TextService(args.workers, args.batch_size, args.batch_delay, args.max_pending,
+                              args.max_batches, args.max_in_flight)
+    except ValueError as e:
+        parser.error(str(e))
+
+    async def serve():
+        address = await service.start(args.host, args.port, args.unix)
+        print(f"Serving text_processor on {address}", file=sys.stderr)
+        await service.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())